@@ -1,32 +1,178 @@
 import os
+import sys
 import uuid
+import math
+import time
 import logging
-from kubernetes import client, config
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from kubernetes import client
 from kubernetes.client.exceptions import ApiException
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
 
-from GitConfig import GitConfig
 from BotConfig import BotConfig
+from BotRegistry import BotRegistry
+from GarbageCollector import GarbageCollector
+from RightSizer import MetricsServerSource, RightSizer
+from BuildScheduler import BuildScheduler
+from BotPacker import (
+    BotPacker,
+    PackGroup,
+    PACK_GROUP_LABEL,
+    PACKED_BOTS_ANNOTATION,
+    kubernetes_name,
+    member_annotation,
+    member_annotations,
+    member_container,
+    packed_bot_ids,
+)
+from DeployMetrics import DeployMetrics
+from BotReconciler import (
+    BotReconciler,
+    BUILD_HASH_ANNOTATION,
+    REPOSITORY_ANNOTATION,
+    SOURCE_COMMIT_ANNOTATION,
+    SPEC_HASH_ANNOTATION,
+    build_hash,
+    manifest_hash,
+)
+from BotStateCache import BotStateCache
+from WatchMultiplexer import WatchMultiplexer
+from ManifestTemplates import (
+    ManifestTemplates,
+    namespace_manifest,
+    role_binding_manifest,
+    role_manifest,
+    secret_manifest,
+    service_account_manifest,
+    to_yaml,
+)
+from KubernetesBackend import KubernetesBackend
+from NamespacePool import NamespacePool
+from LogStream import LogCursor, LogFanIn, LogRingBuffer, iter_response_lines, split_timestamped_line
 
-import docker
-from docker.errors import BuildError, APIError
+# The git and Docker stacks are imported when a clone or build first runs,
+# so calls that never build do not pay for them
+if TYPE_CHECKING:
+    from GitConfig import GitConfig
+    from ImageCache import ImageCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default number of bots allowed in each deploy stage at once during add_bots
+DEFAULT_STAGE_LIMITS = {
+    "clone": 8,
+    "build": 4,
+    "provision": 16,
+    "pod": 16,
+}
+
+# Named conditions for wait_for_bot; a callable taking the bot's state also works
+BOT_CONDITIONS = ("running", "completed", "deleted")
+
 class BotManager:
-    def __init__(self):
+    def __init__(
+        self,
+        watch_pods: bool = False,
+        namespace_pool_size: int = 0,
+        backend=None,
+        metrics_port: Optional[int] = None,
+        docker_client=None,
+        registry_path: Optional[str] = None,
+        max_concurrent_builds: Optional[int] = None,
+        packing_users: Optional[List[str]] = None,
+        metrics_source=None
+    ):
         try:
-            config.load_kube_config()
-            self.kubernetes_core_api = client.CoreV1Api()
-            self.kubernetes_rbac_api = client.RbacAuthorizationV1Api()
-            self.kubernetes_apps_api = client.AppsV1Api()
-            self.kubernetes_auth_api = client.AuthenticationV1Api()
+            # Any object with core_api/rbac_api/apps_api/auth_api and watch(),
+            # e.g. KubernetesBackend, or FakeKubernetesBackend from benchmarks.fake_kubernetes
+            self.backend = backend or KubernetesBackend()
             self.bots: Dict[str, Dict] = {}
+            self._bots_lock = threading.Lock()
+            # user_id -> registered bot IDs, changed with self.bots under _bots_lock
+            self._bot_ids_by_user: Dict[str, Set[str]] = {}
+            self._image_cache: Optional["ImageCache"] = None
+            # Invariant parts of bot manifests, built once per broker profile
+            self.templates = ManifestTemplates()
+            # bot_id -> output of the bot's most recent image build
+            self.build_logs: Dict[str, LogRingBuffer] = {}
+            # Users whose bots share one namespace per user and whose small bots
+            # are packed into multi-container pods; "*" opts in everyone
+            self.packing_users = set(
+                packing_users or filter(None, os.getenv("BOT_PACKING_USERS", "").split(","))
+            )
+            self.packer = BotPacker()
+            # pod name -> pack group and bot_id -> pod name, changed under _packing_lock
+            self.pack_groups: Dict[str, PackGroup] = {}
+            self._pack_group_of: Dict[str, str] = {}
+            self._packing_lock = threading.Lock()
+            self._shared_namespaces = set()
+            self._shared_namespaces_lock = threading.Lock()
+            # Created from the environment on the first build unless one is injected
+            self.docker_client = docker_client
+            self.metrics = DeployMetrics()
+            self.backend.set_call_observer(self.metrics.observe_api_call)
+            if metrics_port is not None:
+                self.metrics.serve(metrics_port)
+            # Builds from every caller share one bounded, fair queue
+            self.build_scheduler = BuildScheduler(
+                max_concurrent_builds, observer=self.metrics.observe_build_queue
+            )
+            self.state_cache = BotStateCache(self.backend)
+            # Time-to-Running is only observed while the state cache is watching
+            self.state_cache.add_listener(self.metrics.observe_pod_state)
+            if watch_pods:
+                self.state_cache.start()
+            # Every wait for a pod or namespace shares one watch per kind
+            self.watches = WatchMultiplexer(self.backend)
+            self.reconciler: Optional[BotReconciler] = None
+            self.garbage_collector = GarbageCollector(self)
+            # Usage samples feed resource recommendations applied on reconcile
+            self.right_sizer = RightSizer(
+                metrics_source or MetricsServerSource(self.backend)
+            )
+            self.namespace_pool: Optional[NamespacePool] = None
+            if namespace_pool_size > 0:
+                self.namespace_pool = NamespacePool(
+                    self.kubernetes_core_api, self.setup_rbac, namespace_pool_size
+                )
+                self.namespace_pool.start()
+            self.registry: Optional[BotRegistry] = None
+            registry_path = registry_path or os.getenv("BOT_REGISTRY_PATH")
+            if registry_path:
+                self.registry = BotRegistry(registry_path)
+                self.recover_bots()
         except Exception as exception:
-            logger.error(f"Failed to load Kubernetes configuration: {exception}")
+            logger.error(f"Failed to initialize bot manager: {exception}")
             raise
 
+    # Resolved through the backend on every use, so the cluster configuration
+    # is only loaded once something actually calls the API
+    @property
+    def kubernetes_core_api(self):
+        return self.backend.core_api
+
+    @property
+    def kubernetes_rbac_api(self):
+        return self.backend.rbac_api
+
+    @property
+    def kubernetes_apps_api(self):
+        return self.backend.apps_api
+
+    @property
+    def kubernetes_auth_api(self):
+        return self.backend.auth_api
+
+    @property
+    def image_cache(self) -> "ImageCache":
+        if self._image_cache is None:
+            from ImageCache import ImageCache
+            self._image_cache = ImageCache()
+        return self._image_cache
+
     def is_authenticated_with_lumiwealth(self) -> bool:
         # Implement Lumiwealth authentication check here
         return True
@@ -40,16 +186,11 @@ class BotManager:
                 return False
         return True
 
-    def create_namespace(self, user_id: str, bot_id: str) -> str:
-        namespace_name = f"bot-{user_id}-{bot_id}"
-        namespace_body = client.V1Namespace(
-            metadata=client.V1ObjectMeta(
-                name=namespace_name,
-                labels={"name": namespace_name}
-            )
-        )
+    def create_namespace(self, user_id: str, bot_id: Optional[str] = None) -> str:
+        # Without a bot_id this is the user's shared namespace in packing mode
+        namespace_name = f"bot-{user_id}-{bot_id}" if bot_id else f"bot-{user_id}"
         try:
-            self.kubernetes_core_api.create_namespace(namespace_body)
+            self.kubernetes_core_api.create_namespace(namespace_manifest(namespace_name))
             logger.info(f"Namespace '{namespace_name}' created.")
         except ApiException as api_exception:
             if api_exception.status == 409:
@@ -59,140 +200,508 @@ class BotManager:
                 raise
         return namespace_name
 
+    def _create_or_patch(self, kind: str, name: str, create, patch):
+        # Redeploys reuse existing objects instead of failing on 409
+        try:
+            create()
+            logger.info(f"{kind} '{name}' created.")
+        except ApiException as api_exception:
+            if api_exception.status != 409:
+                raise
+            patch()
+            logger.info(f"{kind} '{name}' already exists, patched.")
+
+    def delete_namespace(self, namespace: str):
+        try:
+            self.kubernetes_core_api.delete_namespace(namespace)
+            logger.info(f"Namespace '{namespace}' deleted.")
+        except ApiException as api_exception:
+            if api_exception.status == 404:
+                logger.warning(f"Namespace '{namespace}' not found.")
+            else:
+                logger.error(f"Failed to delete namespace: {api_exception}")
+                raise
+
     def setup_rbac(self, namespace: str):
         try:
             # Create a dedicated service account
-            service_account = client.V1ServiceAccount(
-                metadata=client.V1ObjectMeta(name="bot-service-account")
+            service_account = service_account_manifest()
+            self._create_or_patch(
+                "Service account", "bot-service-account",
+                lambda: self.kubernetes_core_api.create_namespaced_service_account(namespace, service_account),
+                lambda: self.kubernetes_core_api.patch_namespaced_service_account(
+                    "bot-service-account", namespace, service_account
+                )
             )
-            self.kubernetes_core_api.create_namespaced_service_account(namespace, service_account)
-            logger.info("Service account 'bot-service-account' created.")
 
             # Create a role with least privileges
-            role = client.V1Role(
-                metadata=client.V1ObjectMeta(namespace=namespace, name="bot-role"),
-                rules=[
-                    client.V1PolicyRule(
-                        api_groups=[""],
-                        resources=[],
-                        verbs=[]
-                    )
-                ]
+            role = role_manifest(namespace)
+            self._create_or_patch(
+                "RBAC role", "bot-role",
+                lambda: self.kubernetes_rbac_api.create_namespaced_role(namespace, role),
+                lambda: self.kubernetes_rbac_api.patch_namespaced_role("bot-role", namespace, role)
             )
-            self.kubernetes_rbac_api.create_namespaced_role(namespace, role)
-            logger.info("RBAC role 'bot-role' created.")
 
             # Bind the role to the service account
-            role_binding = client.V1RoleBinding(
-                metadata=client.V1ObjectMeta(namespace=namespace, name="bot-rolebinding"),
-                subjects=[client.RbacV1Subject(
-                    kind="ServiceAccount",
-                    name="bot-service-account",
-                    namespace=namespace
-                )],
-                role_ref=client.V1RoleRef(
-                    kind="Role",
-                    name="bot-role",
-                    api_group="rbac.authorization.k8s.io"
+            role_binding = role_binding_manifest(namespace)
+            self._create_or_patch(
+                "RBAC role binding", "bot-rolebinding",
+                lambda: self.kubernetes_rbac_api.create_namespaced_role_binding(namespace, role_binding),
+                lambda: self.kubernetes_rbac_api.patch_namespaced_role_binding(
+                    "bot-rolebinding", namespace, role_binding
                 )
             )
-            self.kubernetes_rbac_api.create_namespaced_role_binding(namespace, role_binding)
-            logger.info("RBAC role binding 'bot-rolebinding' created.")
         except ApiException as api_exception:
             logger.error(f"Failed to create RBAC resources: {api_exception}")
             raise
 
-    def create_secret(self, namespace: str, broker_config: Dict):
-        secret_name = "broker-secrets"
-        metadata = client.V1ObjectMeta(name=secret_name)
-        # Remove any None values
-        data = {k: str(v) for k, v in broker_config.items() if v is not None}
-        secret = client.V1Secret(
-            metadata=metadata,
-            string_data=data,
-            type="Opaque",
-        )
+    def is_packed(self, user_id: str) -> bool:
+        return "*" in self.packing_users or user_id in self.packing_users
+
+    def secret_name(self, bot_config: BotConfig) -> str:
+        # A shared namespace holds one secret per broker instead of one per bot
+        if self.is_packed(bot_config.user_id):
+            return f"broker-secrets-{kubernetes_name(bot_config.broker)}"
+        return "broker-secrets"
+
+    def create_secret(self, namespace: str, broker_config: Dict, secret_name: str = "broker-secrets"):
+        secret = secret_manifest(secret_name, broker_config)
         try:
-            self.kubernetes_core_api.create_namespaced_secret(namespace, secret)
-            logger.info(f"Secret '{secret_name}' created in namespace '{namespace}'.")
+            self._create_or_patch(
+                "Secret", secret_name,
+                lambda: self.kubernetes_core_api.create_namespaced_secret(namespace, secret),
+                lambda: self.kubernetes_core_api.patch_namespaced_secret(secret_name, namespace, secret)
+            )
         except ApiException as api_exception:
-            if api_exception.status == 409:
-                logger.warning(f"Secret '{secret_name}' already exists in namespace '{namespace}'.")
+            logger.error(f"Failed to create secret: {api_exception}")
+            raise
+
+    def provision_shared_namespace(self, bot_config: BotConfig) -> str:
+        namespace_name = f"bot-{bot_config.user_id}"
+        with self._shared_namespaces_lock:
+            if namespace_name not in self._shared_namespaces:
+                with self.metrics.stage(bot_config.bot_id, 'namespace'):
+                    self.create_namespace(bot_config.user_id)
+                with self.metrics.stage(bot_config.bot_id, 'rbac'):
+                    self.setup_rbac(namespace_name)
+                self._shared_namespaces.add(namespace_name)
+        with self.metrics.stage(bot_config.bot_id, 'secret'):
+            self.create_secret(namespace_name, bot_config.broker_config, self.secret_name(bot_config))
+        return namespace_name
+
+    def namespace_lost(self, namespace_name: str):
+        # For a namespace deleted behind the manager's back: the next
+        # provisioning recreates it, and its pack groups' pods with it. The
+        # live read skips callers that found it missing before another
+        # re-provisioned it.
+        with self._shared_namespaces_lock:
+            if namespace_name not in self._shared_namespaces:
+                return
+            try:
+                self.kubernetes_core_api.read_namespace(namespace_name)
+                return
+            except ApiException as api_exception:
+                if api_exception.status != 404:
+                    raise
+            self._shared_namespaces.discard(namespace_name)
+        with self._packing_lock:
+            for group in self.pack_groups.values():
+                if group.namespace == namespace_name:
+                    group.created = False
+        logger.warning(f"Namespace '{namespace_name}' was deleted outside the manager, re-provisioning.")
+
+    def provision_bot_namespace(self, bot_config: BotConfig) -> str:
+        if self.is_packed(bot_config.user_id):
+            return self.provision_shared_namespace(bot_config)
+        namespace_name = None
+        bot = self.bots.get(bot_config.bot_id)
+        if bot and NamespacePool.is_pooled(bot['namespace']):
+            # Redeploys keep the pooled namespace the bot already claimed
+            namespace_name = bot['namespace']
+        elif self.namespace_pool and not bot:
+            with self.metrics.stage(bot_config.bot_id, 'namespace'):
+                namespace_name = self.namespace_pool.claim(bot_config.user_id, bot_config.bot_id)
+        if namespace_name is None:
+            with self.metrics.stage(bot_config.bot_id, 'namespace'):
+                namespace_name = self.create_namespace(bot_config.user_id, bot_config.bot_id)
+            with self.metrics.stage(bot_config.bot_id, 'rbac'):
+                self.setup_rbac(namespace_name)
+        with self.metrics.stage(bot_config.bot_id, 'secret'):
+            self.create_secret(namespace_name, bot_config.broker_config)
+        return namespace_name
+
+    def deploy_bot_pod(
+        self,
+        bot_config: BotConfig,
+        git_config: "GitConfig",
+        wait: bool = False,
+        timeout: float = 120.0
+    ) -> str:
+        namespace_name = self.provision_bot_namespace(bot_config)
+        self.create_bot_pod(bot_config, namespace_name)
+        if wait:
+            pod_name, _ = self.bot_placement(bot_config.bot_id)
+            self.wait_for_pod(namespace_name, pod_name, "running", timeout, bot_config.bot_id)
+        return namespace_name
+
+    def _bot_container(self, bot_config: BotConfig, name: str, resources: Dict) -> Dict:
+        return self.templates.container(bot_config, name, resources, self.secret_name(bot_config))
+
+    def build_pod_manifest(self, bot_config: BotConfig, namespace_name: str) -> Dict:
+        spec = self.templates.pod_spec([self._bot_container(bot_config, "bot", bot_config.resources)])
+        # The reconciler compares these against the live pod to decide whether
+        # the pod or the image has to be rebuilt.
+        annotations = {
+            SPEC_HASH_ANNOTATION: manifest_hash(spec),
+            BUILD_HASH_ANNOTATION: build_hash(bot_config.build_parameters),
+            REPOSITORY_ANNOTATION: bot_config.repository_url,
+        }
+        if bot_config.source_commit:
+            annotations[SOURCE_COMMIT_ANNOTATION] = bot_config.source_commit
+        labels = {
+            "app": "bot",
+            "bot_id": bot_config.bot_id,
+            "user_id": bot_config.user_id,
+            "broker": bot_config.broker
+        }
+        return self.templates.pod(f"bot-{bot_config.bot_id}", namespace_name, labels, annotations, spec)
+
+    def _packed_container(self, bot_config: BotConfig) -> Dict:
+        return self._bot_container(
+            bot_config, PackGroup.container_name(bot_config.bot_id), self.packer.container_resources(bot_config)
+        )
+
+    def build_packed_pod_manifest(self, group: PackGroup) -> Dict:
+        # One container per bot; the scheduler sizes the pod from the sum of
+        # the containers' requests while each bot keeps its own limits.
+        members = sorted(group.members.values(), key=lambda member: member.bot_id)
+        containers = [self._packed_container(member) for member in members]
+        annotations = {PACKED_BOTS_ANNOTATION: ",".join(member.bot_id for member in members)}
+        for member, container in zip(members, containers):
+            annotations[member_annotation(SPEC_HASH_ANNOTATION, member.bot_id)] = manifest_hash(container)
+            annotations[member_annotation(BUILD_HASH_ANNOTATION, member.bot_id)] = build_hash(member.build_parameters)
+            annotations[member_annotation(REPOSITORY_ANNOTATION, member.bot_id)] = member.repository_url
+            if member.source_commit:
+                annotations[member_annotation(SOURCE_COMMIT_ANNOTATION, member.bot_id)] = member.source_commit
+        labels = {
+            "app": "bot",
+            "user_id": group.user_id,
+            "broker": group.broker,
+            PACK_GROUP_LABEL: group.pod_name
+        }
+        return self.templates.pod(
+            group.pod_name, group.namespace, labels, annotations, self.templates.pod_spec(containers)
+        )
+
+    def desired_spec_hash(self, bot_config: BotConfig, namespace_name: str) -> str:
+        if self.is_packed(bot_config.user_id) and self.packer.is_small(bot_config):
+            return manifest_hash(self._packed_container(bot_config))
+        return self.build_pod_manifest(bot_config, namespace_name)["metadata"]["annotations"][SPEC_HASH_ANNOTATION]
+
+    def bot_placement(self, bot_id: str) -> Tuple[str, str]:
+        # (pod name, container name) currently running the bot
+        pod_name = self._pack_group_of.get(bot_id)
+        if pod_name:
+            return pod_name, PackGroup.container_name(bot_id)
+        return f"bot-{bot_id}", "bot"
+
+    def render_manifests(
+        self,
+        bot_configs: Optional[List[BotConfig]] = None,
+        include_secrets: bool = False
+    ) -> List[Dict]:
+        # Dry run: the objects deploying these bots (every managed bot by
+        # default) would apply, without calling the API. Secrets hold broker
+        # credentials and are left out unless asked for.
+        if bot_configs is None:
+            bot_configs = [bot['config'] for bot in list(self.bots.values())]
+        manifests: List[Dict] = []
+        pods: List[Dict] = []
+        namespaces = set()
+        secrets = set()
+        rendered_groups = set()
+        to_place: Dict[Tuple[str, str, str], List[BotConfig]] = {}
+        for bot_config in bot_configs:
+            bot = self.bots.get(bot_config.bot_id)
+            packed = self.is_packed(bot_config.user_id)
+            if bot:
+                namespace_name = bot['namespace']
+            elif packed:
+                namespace_name = f"bot-{bot_config.user_id}"
             else:
-                logger.error(f"Failed to create secret: {api_exception}")
-                raise
+                namespace_name = f"bot-{bot_config.user_id}-{bot_config.bot_id}"
+            if namespace_name not in namespaces:
+                namespaces.add(namespace_name)
+                manifests.extend([
+                    namespace_manifest(namespace_name),
+                    service_account_manifest(namespace_name),
+                    role_manifest(namespace_name),
+                    role_binding_manifest(namespace_name),
+                ])
+            secret_name = self.secret_name(bot_config)
+            if include_secrets and (namespace_name, secret_name) not in secrets:
+                secrets.add((namespace_name, secret_name))
+                manifests.append(secret_manifest(secret_name, bot_config.broker_config, namespace_name))
+            if not (packed and self.packer.is_small(bot_config)):
+                pods.append(self.build_pod_manifest(bot_config, namespace_name))
+                continue
+            group = self.pack_groups.get(self._pack_group_of.get(bot_config.bot_id))
+            if group is None:
+                to_place.setdefault((namespace_name, bot_config.user_id, bot_config.broker), []).append(bot_config)
+            elif group.pod_name not in rendered_groups:
+                rendered_groups.add(group.pod_name)
+                pods.append(self.build_packed_pod_manifest(group))
+        # Unplaced small bots go into new groups planned here, named as
+        # add_bots would name them; live groups are left untouched
+        planned_names = set()
+        for (namespace_name, user_id, broker), configs in to_place.items():
+            planned: List[PackGroup] = []
+            self.packer.place(planned, configs, lambda: PackGroup.new(namespace_name, user_id, broker))
+            for group in planned:
+                planned_names.add(group.assign_name(lambda name: name in self.pack_groups or name in planned_names))
+                pods.append(self.build_packed_pod_manifest(group))
+        return manifests + pods
 
-    def deploy_bot_pod(self, bot_config: BotConfig, git_config: GitConfig) -> str:
-        namespace_name = self.create_namespace(bot_config.user_id, bot_config.bot_id)
-        self.setup_rbac(namespace_name)
-        self.create_secret(namespace_name, bot_config.broker_config)
+    def export_manifests(
+        self,
+        path: Optional[str] = None,
+        bot_configs: Optional[List[BotConfig]] = None,
+        include_secrets: bool = False
+    ) -> str:
+        # Multi-document YAML for kubectl apply -f, also written to path if given
+        manifests = self.render_manifests(bot_configs, include_secrets)
+        rendered = to_yaml(manifests)
+        if path:
+            with open(path, "w") as file:
+                file.write(rendered)
+        logger.info(f"Exported {len(manifests)} manifests{f' to {path}' if path else ''}.")
+        return rendered
 
-        pod_name = f"bot-{bot_config.bot_id}"
-        pod_manifest = client.V1Pod(
-            metadata=client.V1ObjectMeta(
-                name=pod_name,
-                namespace=namespace_name,
-                labels={"app": "bot", "bot_id": bot_config.bot_id}
-            ),
-            spec=client.V1PodSpec(
-                service_account_name="bot-service-account",
-                automount_service_account_token=False,
-                security_context=client.V1PodSecurityContext(
-                    run_as_non_root=True,
-                    run_as_user=1000,
-                    run_as_group=3000,
-                    fs_group=2000
-                ),
-                containers=[
-                    client.V1Container(
-                        name="bot",
-                        image=bot_config.image,
-                        image_pull_policy="Always",
-                        resources=client.V1ResourceRequirements(**bot_config.resources),
-                        env=[
-                            client.V1EnvVar(
-                                name=k,
-                                value_from=client.V1EnvVarSource(
-                                    secret_key_ref=client.V1SecretKeySelector(
-                                        name="broker-secrets",
-                                        key=k,
-                                    )
-                                ),
-                            )
-                            for k in bot_config.broker_config.keys()
-                        ],
-                        security_context=client.V1SecurityContext(
-                            run_as_non_root=True,
-                            allow_privilege_escalation=False,
-                            read_only_root_filesystem=True,
-                            capabilities=client.V1Capabilities(
-                                drop=["ALL"]
-                            )
-                        ),
-                    )
-                ],
-                restart_policy="Never",
-                image_pull_secrets=[client.V1LocalObjectReference(name="registry-credentials")]
-            ),
+    def _apply_pack_group(self, group: PackGroup, placed: List[str]):
+        # Pods are immutable, so a membership change recreates the group's pod
+        if group.created:
+            self.terminate_bot_pod(group.namespace, group.pod_name, wait=True)
+            group.created = False
+        if not group.members:
+            self.pack_groups.pop(group.pod_name, None)
+            logger.info(f"Pack group '{group.pod_name}' is empty and was removed.")
+            return
+        self.kubernetes_core_api.create_namespaced_pod(group.namespace, self.build_packed_pod_manifest(group))
+        group.created = True
+        for bot_id in group.members:
+            if bot_id in placed:
+                self._pod_created(bot_id)
+        logger.info(
+            f"Pack group '{group.pod_name}' deployed in namespace '{group.namespace}' "
+            f"with {len(group.members)} bots."
         )
+
+    def place_packed_bots(self, bot_configs: List[BotConfig], namespace_name: str):
+        # Bin-packs small bots of packed users into their groups' pods. Bots
+        # that moved, changed or stopped being small leave their old group.
+        with self._packing_lock:
+            touched: List[PackGroup] = []
+            to_place: Dict[Tuple[str, str], List[BotConfig]] = {}
+            for bot_config in bot_configs:
+                current = self.pack_groups.get(self._pack_group_of.get(bot_config.bot_id))
+                if current is not None:
+                    del current.members[bot_config.bot_id]
+                    del self._pack_group_of[bot_config.bot_id]
+                    is_small = self.packer.is_small(bot_config)
+                    if is_small and current.broker == bot_config.broker and self.packer.fits(current, bot_config):
+                        current.members[bot_config.bot_id] = bot_config
+                        self._pack_group_of[bot_config.bot_id] = current.pod_name
+                    if current not in touched:
+                        touched.append(current)
+                    if bot_config.bot_id in current.members or not is_small:
+                        continue
+                if self.packer.is_small(bot_config):
+                    to_place.setdefault((bot_config.user_id, bot_config.broker), []).append(bot_config)
+
+            for (user_id, broker), configs in to_place.items():
+                groups = [
+                    group for group in self.pack_groups.values()
+                    if group.user_id == user_id and group.broker == broker and group.namespace == namespace_name
+                ]
+
+                created: List[PackGroup] = []
+
+                def new_group(user_id=user_id, broker=broker) -> PackGroup:
+                    group = PackGroup.new(namespace_name, user_id, broker)
+                    created.append(group)
+                    return group
+
+                for group in self.packer.place(groups, configs, new_group):
+                    if group not in touched:
+                        touched.append(group)
+                for group in created:
+                    self.pack_groups[group.assign_name(lambda name: name in self.pack_groups)] = group
+                for bot_config in configs:
+                    self._pack_group_of[bot_config.bot_id] = next(
+                        group.pod_name for group in groups if bot_config.bot_id in group.members
+                    )
+
+            placed = [bot_config.bot_id for bot_config in bot_configs]
+            for group in touched:
+                self._apply_pack_group(group, placed)
+
+    def remove_packed_bots(self, bot_ids: List[str]):
+        # Each affected group's pod is recreated once, however many bots leave it
+        with self._packing_lock:
+            touched: List[PackGroup] = []
+            for bot_id in bot_ids:
+                group = self.pack_groups.get(self._pack_group_of.pop(bot_id, None))
+                if group is not None:
+                    group.members.pop(bot_id, None)
+                    if group not in touched:
+                        touched.append(group)
+            for group in touched:
+                self._apply_pack_group(group, [])
+
+    def redeploy_bot_pod(self, bot_config: BotConfig, namespace_name: str, pod_exists: bool) -> str:
+        pod_name, _ = self.bot_placement(bot_config.bot_id)
+        if pod_exists and pod_name not in self.pack_groups:
+            self.terminate_bot_pod(namespace_name, pod_name, wait=True)
+        return self.create_bot_pod(bot_config, namespace_name)
+
+    def create_bot_pod(self, bot_config: BotConfig, namespace_name: str) -> str:
+        if self.is_packed(bot_config.user_id):
+            if self.packer.is_small(bot_config):
+                with self.metrics.stage(bot_config.bot_id, 'pod'):
+                    self.place_packed_bots([bot_config], namespace_name)
+                return namespace_name
+            # Leaves its pack group, if it had one, for a pod of its own
+            self.place_packed_bots([bot_config], namespace_name)
+        pod_name = f"bot-{bot_config.bot_id}"
+        pod_manifest = self.build_pod_manifest(bot_config, namespace_name)
         try:
-            self.kubernetes_core_api.create_namespaced_pod(namespace_name, pod_manifest)
+            with self.metrics.stage(bot_config.bot_id, 'pod'):
+                self.kubernetes_core_api.create_namespaced_pod(namespace_name, pod_manifest)
+            self._pod_created(bot_config.bot_id)
             logger.info(f"Pod '{pod_name}' deployed in namespace '{namespace_name}'.")
             return namespace_name
         except ApiException as api_exception:
             logger.error(f"Failed to deploy pod: {api_exception}")
             raise
 
-    def terminate_bot_pod(self, namespace: str, pod_name: str):
+    def _pod_created(self, bot_id: str):
+        # Only the state cache closes time-to-Running, so without it nothing is kept
+        if self.state_cache.running:
+            self.metrics.pod_created(bot_id)
+
+    def terminate_bot_pod(self, namespace: str, pod_name: str, wait: bool = False, timeout: float = 120.0):
         try:
             self.kubernetes_core_api.delete_namespaced_pod(pod_name, namespace)
             logger.info(f"Pod '{pod_name}' deleted from namespace '{namespace}'.")
         except ApiException as api_exception:
             if api_exception.status == 404:
                 logger.warning(f"Pod '{pod_name}' not found in namespace '{namespace}'.")
-            else:
-                logger.error(f"Failed to delete pod: {api_exception}")
-                raise
+                return
+            logger.error(f"Failed to delete pod: {api_exception}")
+            raise
+        if wait:
+            self.wait_for_pod_deletion(namespace, pod_name, timeout)
+
+    def wait_for_pod(
+        self,
+        namespace: str,
+        pod_name: str,
+        condition="running",
+        timeout: float = 120.0,
+        bot_id: Optional[str] = None
+    ) -> Optional[Dict]:
+        # Returns the bot's state once condition holds (None for "deleted").
+        # Waiting for "running" fails fast if the pod ends before it gets there.
+        if not callable(condition) and condition not in BOT_CONDITIONS:
+            raise ValueError(f"Unsupported wait condition: {condition}")
+
+        def satisfied(pod) -> bool:
+            if condition == "deleted":
+                return False
+            state = next(
+                (state for state in BotStateCache.pod_states(pod) if bot_id is None or state['bot_id'] == bot_id),
+                None
+            )
+            if state is None:
+                return False
+            if callable(condition):
+                return condition(state)
+            if condition == "completed":
+                return state['phase'] in ("Succeeded", "Failed")
+            if state['phase'] in ("Succeeded", "Failed"):
+                raise RuntimeError(
+                    f"Pod '{pod_name}' in namespace '{namespace}' ended as {state['phase']} ({state['reason']})."
+                )
+            return state['phase'] == "Running"
+
+        # The shared watch may still deliver events for an earlier pod of the
+        # same name, so the wait follows one pod by uid. check() pins it from a
+        # direct read, or after a 404 the next pod added; events before that
+        # add nothing the read doesn't see. The lock orders events around reads.
+        tracked = {'uid': None, 'checked': False}
+        tracked_lock = threading.Lock()
+
+        def on_event(event_type: str, pod) -> bool:
+            if (pod.metadata.namespace, pod.metadata.name) != (namespace, pod_name):
+                return False
+            with tracked_lock:
+                if tracked['uid'] is None:
+                    if event_type != 'ADDED' or not tracked['checked']:
+                        return False
+                    tracked['uid'] = pod.metadata.uid
+                elif pod.metadata.uid != tracked['uid']:
+                    return False
+            if event_type == 'DELETED':
+                if condition == "deleted":
+                    return True
+                raise RuntimeError(f"Pod '{pod_name}' in namespace '{namespace}' was deleted.")
+            return satisfied(pod)
+
+        def check():
+            with tracked_lock:
+                tracked['checked'] = True
+                try:
+                    pod = self.kubernetes_core_api.read_namespaced_pod(pod_name, namespace)
+                except ApiException as api_exception:
+                    if api_exception.status == 404:
+                        return True if condition == "deleted" else None
+                    raise
+                if tracked['uid'] is None:
+                    tracked['uid'] = pod.metadata.uid
+                elif pod.metadata.uid != tracked['uid']:
+                    # Replaced since it was pinned
+                    if condition == "deleted":
+                        return True
+                    raise RuntimeError(f"Pod '{pod_name}' in namespace '{namespace}' was deleted.")
+            return pod if satisfied(pod) else None
+
+        try:
+            pod = self.watches.wait(
+                "list_pod_for_all_namespaces", on_event, check, timeout, label_selector="app=bot"
+            )
+        except TimeoutError:
+            raise TimeoutError(
+                f"Pod '{pod_name}' in namespace '{namespace}' did not reach "
+                f"'{condition if isinstance(condition, str) else 'condition'}' within {timeout}s."
+            ) from None
+        if condition == "deleted":
+            logger.info(f"Pod '{pod_name}' in namespace '{namespace}' is gone.")
+            return None
+        return next(
+            (state for state in BotStateCache.pod_states(pod) if bot_id is None or state['bot_id'] == bot_id),
+            None
+        )
+
+    def wait_for_pod_deletion(self, namespace: str, pod_name: str, timeout: float = 120.0):
+        self.wait_for_pod(namespace, pod_name, "deleted", timeout)
+
+    def wait_for_bot(self, bot_id: str, condition="running", timeout: float = 120.0) -> Optional[Dict]:
+        bot = self.bots.get(bot_id)
+        if not bot:
+            logger.error(f"Bot with ID '{bot_id}' not found.")
+            return None
+        pod_name, _ = self.bot_placement(bot_id)
+        return self.wait_for_pod(bot['namespace'], pod_name, condition, timeout, bot_id)
 
     def retrieve_pod_logs(self, namespace: str, pod_name: str) -> str:
         try:
@@ -202,84 +711,760 @@ class BotManager:
             logger.error(f"Failed to get logs for pod '{pod_name}': {api_exception}")
             raise
 
-    def build_and_deploy_bot(self, bot_config: BotConfig, git_config: GitConfig) -> str:
+    def open_pod_logs(
+        self,
+        namespace: str,
+        pod_name: str,
+        follow: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+        timestamps: bool = False,
+        container: Optional[str] = None
+    ):
+        # The raw response, for readers that must be able to close it
+        optional_parameters = {
+            'since_seconds': since_seconds,
+            'tail_lines': tail_lines,
+            'limit_bytes': limit_bytes,
+            'container': container,
+        }
         try:
-            repository_path = git_config.clone_repository(bot_config.repository_url)
+            return self.kubernetes_core_api.read_namespaced_pod_log(
+                pod_name,
+                namespace,
+                follow=follow,
+                timestamps=timestamps,
+                _preload_content=False,
+                **{k: v for k, v in optional_parameters.items() if v is not None}
+            )
+        except ApiException as api_exception:
+            logger.error(f"Failed to stream logs for pod '{pod_name}': {api_exception}")
+            raise
+
+    def stream_pod_logs(
+        self,
+        namespace: str,
+        pod_name: str,
+        follow: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+        timestamps: bool = False,
+        container: Optional[str] = None
+    ) -> Iterator[str]:
+        yield from iter_response_lines(self.open_pod_logs(
+            namespace, pod_name, follow, since_seconds, tail_lines, limit_bytes, timestamps, container
+        ))
+
+    def clone_bot_repository(
+        self,
+        bot_config: BotConfig,
+        git_config: "GitConfig",
+        revision: Optional[str] = None
+    ) -> str:
+        with self.metrics.stage(bot_config.bot_id, 'clone'):
+            repository_path = git_config.clone_repository(bot_config.repository_url, revision)
             if not repository_path:
                 raise ValueError("Failed to clone repository")
+        import git
+        bot_config.source_commit = git.Repo(repository_path).head.commit.hexsha
+        return repository_path
 
-            docker_client = docker.from_env()
-            docker_image_tag = f"bot:{uuid.uuid4().hex[:8]}"
+    def build_bot_image(self, bot_config: BotConfig, repository_path: str) -> str:
+        from BuildContext import stream_build
+        if self.docker_client is None:
+            import docker
+            self.docker_client = docker.from_env()
+        docker_client = self.docker_client
+        cache_tag = self.image_cache.cache_tag(repository_path, bot_config.build_parameters)
+        if cache_tag:
+            cached_image = self.image_cache.lookup(docker_client, cache_tag)
+            if cached_image:
+                logger.info(f"Reusing cached Docker image '{cached_image}'.")
+                bot_config.image = cached_image
+                return cached_image
+        docker_image_tag = cache_tag or f"bot:{uuid.uuid4().hex[:8]}"
 
-            image, build_logs = docker_client.images.build(
-                path=repository_path,
-                tag=docker_image_tag,
-                buildargs=bot_config.build_parameters,
-                rm=True
-            )
-            logger.info(f"Docker image '{docker_image_tag}' built successfully.")
+        def build():
+            build_log = LogRingBuffer()
+            with self._bots_lock:
+                self.build_logs[bot_config.bot_id] = build_log
+            with self.metrics.stage(bot_config.bot_id, 'build'):
+                return stream_build(
+                    docker_client,
+                    repository_path,
+                    docker_image_tag,
+                    bot_config.build_parameters,
+                    build_log
+                )
 
-            bot_config.image = docker_image_tag
-            return self.deploy_bot_pod(bot_config, git_config)
-        except BuildError as build_error:
-            logger.error(f"Docker build failed: {build_error}")
-            raise
-        except APIError as api_error:
-            logger.error(f"Docker API error: {api_error}")
-            raise
+        # Raises CancelledError if a newer build for this bot replaces it in the queue
+        image = self.build_scheduler.submit(bot_config, build).result()
+        logger.info(f"Docker image '{docker_image_tag}' built successfully.")
+
+        if cache_tag:
+            docker_image_tag = self.image_cache.store(docker_client, cache_tag, image)
+
+        bot_config.image = docker_image_tag
+        return docker_image_tag
+
+    def build_and_deploy_bot(
+        self,
+        bot_config: BotConfig,
+        git_config: "GitConfig",
+        wait: bool = False,
+        timeout: float = 120.0
+    ) -> str:
+        self.metrics.deploy_started(bot_config.bot_id)
+        try:
+            repository_path = self.clone_bot_repository(bot_config, git_config)
+            try:
+                self.build_bot_image(bot_config, repository_path)
+            finally:
+                git_config.release_repository(repository_path)
+            namespace = self.deploy_bot_pod(bot_config, git_config, wait, timeout)
+            self.metrics.deploy_finished(bot_config.bot_id, succeeded=True)
+            return namespace
         except Exception as exception:
-            logger.error(f"Failed to build and deploy bot: {exception}")
+            # Docker errors can only be raised once a build has imported docker
+            docker_errors = sys.modules.get("docker.errors")
+            if docker_errors and isinstance(exception, docker_errors.BuildError):
+                logger.error(f"Docker build failed: {exception}")
+            elif docker_errors and isinstance(exception, docker_errors.APIError):
+                logger.error(f"Docker API error: {exception}")
+            else:
+                logger.error(f"Failed to build and deploy bot: {exception}")
+            self.metrics.deploy_finished(bot_config.bot_id, succeeded=False)
             raise
 
-    def add_bot(self, bot_config: BotConfig, git_config: GitConfig) -> str:
+    def _register_bot(self, bot_config: BotConfig, namespace: str):
+        with self._bots_lock:
+            self.bots[bot_config.bot_id] = {
+                'config': bot_config,
+                'namespace': namespace,
+                'logs': LogRingBuffer(),
+                'log_cursor': LogCursor()
+            }
+            self._bot_ids_by_user.setdefault(bot_config.user_id, set()).add(bot_config.bot_id)
+        self.persist_bot(bot_config.bot_id)
+
+    def persist_bot(self, bot_id: str):
+        bot = self.bots.get(bot_id)
+        if self.registry and bot:
+            self.registry.upsert(bot['config'], bot['namespace'])
+
+    @staticmethod
+    def _config_from_record(record: Dict) -> BotConfig:
+        bot_config = BotConfig(
+            user_id=record['user_id'],
+            bot_id=record['bot_id'],
+            repository_url=record['repository_url'],
+            broker=record['broker']
+        )
+        bot_config.image = record['image']
+        bot_config.source_commit = record['source_commit']
+        if record['resources']:
+            bot_config.resources = record['resources']
+        bot_config.build_parameters = record['build_parameters']
+        return bot_config
+
+    def _adopt_pack_member(self, pod, bot_config: BotConfig):
+        if bot_config.bot_id not in packed_bot_ids(pod):
+            return
+        with self._packing_lock:
+            group = self.pack_groups.get(pod.metadata.name)
+            if group is None:
+                labels = pod.metadata.labels
+                group = PackGroup(pod.metadata.name, pod.metadata.namespace, labels['user_id'], labels['broker'])
+                group.created = True
+                self.pack_groups[group.pod_name] = group
+            group.members[bot_config.bot_id] = bot_config
+            self._pack_group_of[bot_config.bot_id] = group.pod_name
+        self._shared_namespaces.add(pod.metadata.namespace)
+
+    def recover_bots(self) -> Dict[str, int]:
+        # Rehydrate from the registry, then reconcile against a single
+        # label-selected pod list instead of scanning namespaces one by one.
+        records = {record['bot_id']: record for record in self.registry.all()}
+        try:
+            pods = self.kubernetes_core_api.list_pod_for_all_namespaces(label_selector="app=bot").items
+        except ApiException as api_exception:
+            logger.error(f"Failed to list bot pods during recovery: {api_exception}")
+            raise
+        live_pods = {}
+        for pod in pods:
+            for bot_id in packed_bot_ids(pod):
+                live_pods[bot_id] = pod
+            if (pod.metadata.labels or {}).get('bot_id'):
+                live_pods[pod.metadata.labels['bot_id']] = pod
+
+        counts = {'recovered': 0, 'missing': 0, 'adopted': 0, 'orphaned': 0}
+        for bot_id, record in records.items():
+            pod = live_pods.get(bot_id)
+            namespace = pod.metadata.namespace if pod else record['namespace']
+            with self._bots_lock:
+                self.bots[bot_id] = {
+                    'config': self._config_from_record(record),
+                    'namespace': namespace,
+                    'logs': LogRingBuffer(),
+                    'log_cursor': LogCursor()
+                }
+                self._bot_ids_by_user.setdefault(record['user_id'], set()).add(bot_id)
+            if pod is None:
+                logger.warning(f"Bot '{bot_id}' is registered but has no pod.")
+                counts['missing'] += 1
+            else:
+                self._adopt_pack_member(pod, self.bots[bot_id]['config'])
+                if namespace != record['namespace']:
+                    self.persist_bot(bot_id)
+            counts['recovered'] += 1
+
+        for bot_id, pod in live_pods.items():
+            if bot_id in records:
+                continue
+            annotations = member_annotations(pod.metadata.annotations or {}, bot_id)
+            labels = pod.metadata.labels
+            repository_url = annotations.get(REPOSITORY_ANNOTATION)
+            if not repository_url or not labels.get('user_id') or not labels.get('broker'):
+                logger.warning(f"Pod for unregistered bot '{bot_id}' cannot be adopted.")
+                counts['orphaned'] += 1
+                continue
+            try:
+                bot_config = BotConfig(labels['user_id'], bot_id, repository_url, labels['broker'])
+            except ValueError:
+                counts['orphaned'] += 1
+                continue
+            bot_config.image = member_container(pod, bot_id).image
+            bot_config.source_commit = annotations.get(SOURCE_COMMIT_ANNOTATION)
+            self._adopt_pack_member(pod, bot_config)
+            self._register_bot(bot_config, pod.metadata.namespace)
+            counts['adopted'] += 1
+
+        logger.info(
+            f"Recovered {counts['recovered']} bots from registry "
+            f"({counts['missing']} without pods), adopted {counts['adopted']}, "
+            f"{counts['orphaned']} orphaned pods."
+        )
+        return counts
+
+    def add_bot(
+        self,
+        bot_config: BotConfig,
+        git_config: "GitConfig",
+        wait: bool = False,
+        timeout: float = 120.0
+    ) -> str:
+        # With wait, returns only once the bot's pod is Running. The bot is
+        # registered as soon as its pod exists, so a failed or timed-out wait
+        # still leaves it tracked and removable.
         namespace = self.build_and_deploy_bot(bot_config, git_config)
-        self.bots[bot_config.bot_id] = {
-            'config': bot_config,
-            'namespace': namespace,
-            'logs': ''
-        }
+        self._register_bot(bot_config, namespace)
         logger.info(f"Bot '{bot_config.bot_id}' added and deployed in namespace '{namespace}'.")
+        if wait:
+            self.wait_for_bot(bot_config.bot_id, "running", timeout)
         return bot_config.bot_id
 
+    def add_bots(
+        self,
+        bot_configs: List[BotConfig],
+        git_config: "GitConfig",
+        max_workers: int = 32,
+        stage_limits: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Dict]:
+        # Every bot runs clone -> build -> provision -> pod on the worker pool.
+        # Each stage is gated by its own semaphore, so while some bots are
+        # building others are already cloning or provisioning.
+        limits = dict(DEFAULT_STAGE_LIMITS)
+        limits.update(stage_limits or {})
+        stage_semaphores = {
+            stage: threading.BoundedSemaphore(limit) for stage, limit in limits.items()
+        }
+
+        unique_configs: Dict[str, BotConfig] = {}
+        for bot_config in bot_configs:
+            if bot_config.bot_id in unique_configs:
+                logger.warning(f"Duplicate bot ID '{bot_config.bot_id}' in batch, skipping.")
+                continue
+            unique_configs[bot_config.bot_id] = bot_config
+
+        results: Dict[str, Dict] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                bot_config.bot_id: executor.submit(
+                    self._deploy_pipeline, bot_config, git_config, stage_semaphores
+                )
+                for bot_config in unique_configs.values()
+            }
+            for bot_id, future in futures.items():
+                results[bot_id] = future.result()
+
+        pending = [unique_configs[bot_id] for bot_id, result in results.items() if result['status'] == 'pending']
+        if pending:
+            self._place_batch(pending, results)
+
+        deployed = sum(1 for result in results.values() if result['status'] == 'deployed')
+        logger.info(f"Batch deploy finished: {deployed}/{len(results)} bots deployed.")
+        return results
+
+    def _deploy_pipeline(
+        self,
+        bot_config: BotConfig,
+        git_config: "GitConfig",
+        stage_semaphores: Dict[str, threading.BoundedSemaphore]
+    ) -> Dict:
+        result = {
+            'bot_id': bot_config.bot_id,
+            'status': 'failed',
+            'stage': None,
+            'namespace': None,
+            'error': None,
+        }
+        self.metrics.deploy_started(bot_config.bot_id)
+        try:
+            result['stage'] = 'clone'
+            with stage_semaphores['clone']:
+                repository_path = self.clone_bot_repository(bot_config, git_config)
+
+            result['stage'] = 'build'
+            try:
+                with stage_semaphores['build']:
+                    self.build_bot_image(bot_config, repository_path)
+            finally:
+                git_config.release_repository(repository_path)
+
+            result['stage'] = 'provision'
+            with stage_semaphores['provision']:
+                namespace = self.provision_bot_namespace(bot_config)
+            result['namespace'] = namespace
+
+            result['stage'] = 'pod'
+            if self.is_packed(bot_config.user_id) and self.packer.is_small(bot_config):
+                # Bin-packed together with the rest of the batch once all builds are done
+                result['status'] = 'pending'
+                return result
+            with stage_semaphores['pod']:
+                self.create_bot_pod(bot_config, namespace)
+        except Exception as exception:
+            logger.error(
+                f"Failed to deploy bot '{bot_config.bot_id}' at stage '{result['stage']}': {exception}"
+            )
+            result['error'] = exception
+            self.metrics.deploy_finished(bot_config.bot_id, succeeded=False)
+            return result
+
+        self.metrics.deploy_finished(bot_config.bot_id, succeeded=True)
+        self._register_bot(bot_config, namespace)
+        result['status'] = 'deployed'
+        result['stage'] = None
+        logger.info(f"Bot '{bot_config.bot_id}' added and deployed in namespace '{namespace}'.")
+        return result
+
+    def _place_batch(self, bot_configs: List[BotConfig], results: Dict[str, Dict]):
+        by_namespace: Dict[str, List[BotConfig]] = {}
+        for bot_config in bot_configs:
+            by_namespace.setdefault(results[bot_config.bot_id]['namespace'], []).append(bot_config)
+        for namespace, configs in by_namespace.items():
+            try:
+                self.place_packed_bots(configs, namespace)
+            except Exception as exception:
+                logger.error(f"Failed to place packed bots in namespace '{namespace}': {exception}")
+                for bot_config in configs:
+                    results[bot_config.bot_id].update(status='failed', error=exception)
+                    self.metrics.deploy_finished(bot_config.bot_id, succeeded=False)
+                continue
+            for bot_config in configs:
+                self.metrics.deploy_finished(bot_config.bot_id, succeeded=True)
+                self._register_bot(bot_config, namespace)
+                results[bot_config.bot_id].update(status='deployed', stage=None)
+                logger.info(
+                    f"Bot '{bot_config.bot_id}' added and deployed in pod "
+                    f"'{self._pack_group_of[bot_config.bot_id]}' of namespace '{namespace}'."
+                )
+
+    def delete_namespaces(
+        self,
+        namespaces: List[str],
+        propagation_policy: str = "Background",
+        wait: bool = True,
+        timeout: int = 300,
+        max_workers: int = 16
+    ) -> Dict[str, Optional[Exception]]:
+        # Deletes concurrently; deleting a namespace takes its pods, secret,
+        # service account, role and rolebinding with it.
+        if not namespaces:
+            return {}
+        delete_options = client.V1DeleteOptions(propagation_policy=propagation_policy)
+
+        def delete(namespace: str) -> Optional[Exception]:
+            try:
+                self.kubernetes_core_api.delete_namespace(namespace, body=delete_options)
+            except ApiException as api_exception:
+                if api_exception.status != 404:
+                    logger.error(f"Failed to delete namespace '{namespace}': {api_exception}")
+                    return api_exception
+            return None
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(namespaces))) as executor:
+            errors = dict(zip(namespaces, executor.map(delete, namespaces)))
+        deleted = [namespace for namespace, error in errors.items() if error is None]
+        for namespace in deleted:
+            self._shared_namespaces.discard(namespace)
+        logger.info(f"Deleting {len(deleted)}/{len(namespaces)} namespaces ({propagation_policy}).")
+        if wait:
+            self.wait_for_namespace_deletion(deleted, timeout)
+        return errors
+
+    def wait_for_namespace_deletion(self, namespaces: List[str], timeout: float = 300.0):
+        pending = set(namespaces)
+        if not pending:
+            return
+
+        def on_event(event_type: str, namespace) -> bool:
+            if event_type == 'DELETED':
+                pending.discard(namespace.metadata.name)
+            return not pending
+
+        def check():
+            pending.intersection_update(
+                namespace.metadata.name for namespace in self.kubernetes_core_api.list_namespace().items
+            )
+            return True if not pending else None
+
+        try:
+            self.watches.wait("list_namespace", on_event, check, timeout)
+        except TimeoutError:
+            raise TimeoutError(f"{len(pending)} namespaces were not deleted within {timeout}s.") from None
+
+    def _forget_bot(self, bot_id: str):
+        self.build_scheduler.cancel(bot_id)
+        with self._bots_lock:
+            bot = self.bots.pop(bot_id, None)
+            if bot:
+                user_bot_ids = self._bot_ids_by_user.get(bot['config'].user_id, set())
+                user_bot_ids.discard(bot_id)
+                if not user_bot_ids:
+                    self._bot_ids_by_user.pop(bot['config'].user_id, None)
+            self.build_logs.pop(bot_id, None)
+        self.right_sizer.forget(bot_id)
+        self.metrics.forget(bot_id)
+        if self.registry:
+            self.registry.delete(bot_id)
+
+    def select_bots(self, selector: Optional[Dict[str, str]] = None) -> List[str]:
+        # Matches on BotConfig attributes (user_id, broker, ...) and 'namespace'
+        selector = selector or {}
+        return [
+            bot_id for bot_id, bot in list(self.bots.items())
+            if all(
+                (bot['namespace'] if key == 'namespace' else getattr(bot['config'], key, None)) == value
+                for key, value in selector.items()
+            )
+        ]
+
+    def remove_bots(
+        self,
+        selector: Optional[Dict[str, str]] = None,
+        bot_ids: Optional[List[str]] = None,
+        propagation_policy: str = "Background",
+        wait: bool = True,
+        timeout: int = 300
+    ) -> Dict[str, Dict]:
+        # An empty selector matches the whole fleet, so it is never the default
+        if not selector and bot_ids is None:
+            raise ValueError("remove_bots needs a non-empty selector or explicit bot_ids.")
+        selected = [bot_id for bot_id in bot_ids if bot_id in self.bots] if bot_ids is not None else self.select_bots(selector)
+        packed, shared, namespaces = [], [], {}
+        for bot_id in selected:
+            bot = self.bots[bot_id]
+            if bot_id in self._pack_group_of:
+                packed.append(bot_id)
+            elif bot['namespace'] == f"bot-{bot['config'].user_id}":
+                # Own pod in a user's shared namespace, which outlives the bot
+                shared.append(bot_id)
+            else:
+                namespaces.setdefault(bot['namespace'], []).append(bot_id)
+
+        results = {bot_id: {'bot_id': bot_id, 'status': 'removed', 'error': None} for bot_id in selected}
+        if packed:
+            try:
+                self.remove_packed_bots(packed)
+            except Exception as exception:
+                logger.error(f"Failed to remove packed bots: {exception}")
+                for bot_id in packed:
+                    results[bot_id].update(status='failed', error=exception)
+
+        def remove_own_pod(bot_id: str):
+            self.terminate_bot_pod(self.bots[bot_id]['namespace'], f"bot-{bot_id}", wait, timeout)
+
+        if shared:
+            with ThreadPoolExecutor(max_workers=min(16, len(shared))) as executor:
+                futures = {bot_id: executor.submit(remove_own_pod, bot_id) for bot_id in shared}
+            for bot_id, future in futures.items():
+                error = future.exception()
+                if isinstance(error, TimeoutError):
+                    # Deletion was accepted and is still running
+                    results[bot_id].update(status='terminating', error=error)
+                elif error:
+                    results[bot_id].update(status='failed', error=error)
+
+        # Waited for here rather than in delete_namespaces, so a timeout keeps
+        # the per-namespace outcome of the deletes
+        errors = self.delete_namespaces(list(namespaces), propagation_policy, wait=False)
+        for namespace, error in errors.items():
+            if error is not None:
+                for bot_id in namespaces[namespace]:
+                    results[bot_id].update(status='failed', error=error)
+        if wait:
+            try:
+                self.wait_for_namespace_deletion(
+                    [namespace for namespace, error in errors.items() if error is None], timeout
+                )
+            except TimeoutError as timeout_error:
+                logger.warning(f"Bot namespaces are still terminating: {timeout_error}")
+                for namespace, error in errors.items():
+                    if error is None:
+                        for bot_id in namespaces[namespace]:
+                            results[bot_id].update(status='terminating', error=timeout_error)
+
+        # Bots whose deletion was accepted are forgotten even if it is still running
+        for bot_id, result in results.items():
+            if result['status'] in ('removed', 'terminating'):
+                self._forget_bot(bot_id)
+        removed = sum(1 for result in results.values() if result['status'] == 'removed')
+        terminating = sum(1 for result in results.values() if result['status'] == 'terminating')
+        logger.info(
+            f"Removed {removed}/{len(results)} bots"
+            f"{f', {terminating} still terminating' if terminating else ''}."
+        )
+        return results
+
     def remove_bot(self, bot_id: str):
+        if bot_id not in self.bots:
+            logger.error(f"Bot with ID '{bot_id}' not found.")
+            return
+        result = self.remove_bots(bot_ids=[bot_id], wait=False)[bot_id]
+        if result['error'] is not None:
+            raise result['error']
+        logger.info(f"Bot '{bot_id}' has been removed and terminated.")
+
+    def collect_garbage(self, dry_run: bool = False) -> List[str]:
+        return self.garbage_collector.collect(dry_run)
+
+    def start_garbage_collection(self, interval: float = 3600.0):
+        self.garbage_collector.start(interval)
+
+    def stop_garbage_collection(self):
+        self.garbage_collector.stop()
+
+    def stream_bot_logs(
+        self,
+        bot_id: str,
+        follow: bool = True,
+        tail_lines: Optional[int] = None,
+        limit_bytes: Optional[int] = None
+    ) -> Iterator[str]:
+        # Yields only output newer than what earlier calls already returned,
+        # keeping the most recent lines in the bot's bounded buffer.
         bot = self.bots.get(bot_id)
-        if bot:
-            pod_name = f"bot-{bot_id}"
-            self.terminate_bot_pod(bot['namespace'], pod_name)
-            del self.bots[bot_id]
-            logger.info(f"Bot '{bot_id}' has been removed and terminated.")
-        else:
+        if not bot:
             logger.error(f"Bot with ID '{bot_id}' not found.")
+            return
+        cursor = bot['log_cursor']
+        since_seconds = cursor.since_seconds()
+        if since_seconds is None and tail_lines is None:
+            tail_lines = bot['logs'].max_lines
+        is_new = cursor.start_filter()
+        pod_name, container_name = self.bot_placement(bot_id)
+        for line in self.stream_pod_logs(
+            bot['namespace'],
+            pod_name,
+            follow=follow,
+            since_seconds=since_seconds,
+            tail_lines=tail_lines,
+            limit_bytes=limit_bytes,
+            timestamps=True,
+            container=container_name
+        ):
+            timestamp, text = split_timestamped_line(line)
+            if not is_new(timestamp):
+                continue
+            cursor.advance(timestamp)
+            bot['logs'].append(text)
+            yield text
 
     def get_bot_logs(self, bot_id: str) -> Optional[str]:
         bot = self.bots.get(bot_id)
         if bot:
-            pod_name = f"bot-{bot_id}"
-            logs = self.retrieve_pod_logs(bot['namespace'], pod_name)
-            bot['logs'] = logs
-            return logs
+            for _ in self.stream_bot_logs(bot_id, follow=False):
+                pass
+            return bot['logs'].text()
         else:
             logger.error(f"Bot with ID '{bot_id}' not found.")
             return None
 
-    def list_bots(self) -> Dict[str, Dict]:
-        return self.bots
+    def tail_logs(
+        self,
+        user_id: Optional[str] = None,
+        broker: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        since_time: Optional[datetime] = None,
+        pattern: Optional[str] = None,
+        follow: bool = True,
+        reorder_window: float = 1.0,
+        max_buffered_lines: int = 10000
+    ) -> Iterator[str]:
+        selector = {"app": "bot"}
+        if user_id is not None:
+            selector["user_id"] = user_id
+        if broker is not None:
+            selector["broker"] = broker
+        selector.update(labels or {})
+        label_selector = ",".join(f"{k}={v}" for k, v in selector.items())
+        try:
+            pods = self.kubernetes_core_api.list_pod_for_all_namespaces(label_selector=label_selector).items
+        except ApiException as api_exception:
+            logger.error(f"Failed to list pods for '{label_selector}': {api_exception}")
+            raise
+
+        # The pod log API only takes a relative window, so since_time is
+        # widened to whole seconds here and trimmed exactly per line.
+        since_seconds = None
+        since_timestamp = None
+        if since_time is not None:
+            if since_time.tzinfo is None:
+                since_time = since_time.replace(tzinfo=timezone.utc)
+            since_seconds = max(1, math.ceil(time.time() - since_time.timestamp()))
+            since_timestamp = int(since_time.timestamp() * 1_000_000_000)
 
-    def update_bot_config(self, bot_id: str, new_config: BotConfig, git_config: GitConfig):
+        def open_stream(pod, container: Optional[str] = None):
+            return lambda: self.open_pod_logs(
+                pod.metadata.namespace,
+                pod.metadata.name,
+                follow=follow,
+                since_seconds=since_seconds,
+                timestamps=True,
+                container=container
+            )
+
+        sources = {}
+        for pod in pods:
+            bot_ids = packed_bot_ids(pod)
+            if bot_ids:
+                # A packed pod is one log source per bot container
+                for bot_id in bot_ids:
+                    sources[bot_id] = open_stream(pod, PackGroup.container_name(bot_id))
+            else:
+                sources[pod.metadata.labels.get("bot_id", pod.metadata.name)] = open_stream(pod)
+        logger.info(f"Tailing logs for {len(sources)} bots matching '{label_selector}'.")
+        fan_in = LogFanIn(
+            sources,
+            pattern=pattern,
+            since_timestamp=since_timestamp,
+            reorder_window=reorder_window,
+            max_buffered_lines=max_buffered_lines
+        )
+        for _, bot_id, text in fan_in:
+            yield f"[{bot_id}] {text}"
+
+    def get_build_logs(self, bot_id: str) -> Optional[str]:
+        build_log = self.build_logs.get(bot_id)
+        if build_log is None:
+            logger.error(f"No build logs for bot '{bot_id}'.")
+            return None
+        return build_log.text()
+
+    def get_build_stats(self) -> Dict:
+        return self.build_scheduler.stats()
+
+    def get_deploy_trace(self, bot_id: str) -> List[Dict]:
+        return self.metrics.trace(bot_id)
+
+    def list_bots(self, user_id: Optional[str] = None, namespace: Optional[str] = None) -> Dict[str, Dict]:
+        # Registered bots, with or without a live pod, whether or not the
+        # state cache runs; a user's bots come from the user index
+        if user_id is None and namespace is None:
+            return self.bots
+        with self._bots_lock:
+            if user_id is not None:
+                candidates = [
+                    (bot_id, self.bots[bot_id]) for bot_id in self._bot_ids_by_user.get(user_id, ())
+                    if bot_id in self.bots
+                ]
+            else:
+                candidates = list(self.bots.items())
+        return {
+            bot_id: bot for bot_id, bot in candidates
+            if namespace is None or bot['namespace'] == namespace
+        }
+
+    def get_bot_status(self, bot_id: str) -> Optional[Dict]:
+        if self.state_cache.running:
+            return self.state_cache.get(bot_id)
         bot = self.bots.get(bot_id)
-        if bot:
-            # Terminate existing bot
-            pod_name = f"bot-{bot_id}"
-            self.terminate_bot_pod(bot['namespace'], pod_name)
-            logger.info(f"Bot '{bot_id}' pod terminated for configuration update.")
+        if not bot:
+            logger.error(f"Bot with ID '{bot_id}' not found.")
+            return None
+        pod_name, _ = self.bot_placement(bot_id)
+        try:
+            pod = self.kubernetes_core_api.read_namespaced_pod(pod_name, bot['namespace'])
+        except ApiException as api_exception:
+            if api_exception.status == 404:
+                return None
+            logger.error(f"Failed to get status for bot '{bot_id}': {api_exception}")
+            raise
+        return next((state for state in BotStateCache.pod_states(pod) if state['bot_id'] == bot_id), None)
 
-            # Update configuration
-            bot['config'] = new_config
+    def update_bot_config(self, bot_id: str, new_config: BotConfig, git_config: "GitConfig"):
+        bot = self.bots.get(bot_id)
+        if bot:
+            with self._bots_lock:
+                old_user_id = bot['config'].user_id
+                bot['config'] = new_config
+                if new_config.user_id != old_user_id:
+                    self._bot_ids_by_user.get(old_user_id, set()).discard(bot_id)
+                    self._bot_ids_by_user.setdefault(new_config.user_id, set()).add(bot_id)
+            with self._packing_lock:
+                group = self.pack_groups.get(self._pack_group_of.get(bot_id))
+                if group is not None:
+                    # Siblings redeploying the group's pod must use the new config too
+                    group.members[bot_id] = new_config
             logger.info(f"Configuration for bot '{bot_id}' has been updated.")
 
-            # Redeploy bot with new configuration
-            namespace = self.build_and_deploy_bot(new_config, git_config)
-            bot['namespace'] = namespace
-            logger.info(f"Bot '{bot_id}' redeployed in namespace '{namespace}'.")
+            # Only touch what changed: secret, image, pod
+            try:
+                result = BotReconciler(self, git_config).reconcile(new_config, bot['namespace'])
+            except CancelledError:
+                logger.info(f"Update for bot '{bot_id}' superseded by a newer configuration.")
+                return
+            bot['namespace'] = result['namespace']
+            self.persist_bot(bot_id)
+            logger.info(f"Bot '{bot_id}' reconciled in namespace '{result['namespace']}'.")
         else:
             logger.error(f"Bot with ID '{bot_id}' not found.")
+
+    def reconcile_bots(self, git_config: "GitConfig", bot_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        return BotReconciler(self, git_config).reconcile_all(bot_ids)
+
+    def start_reconcile_loop(self, git_config: "GitConfig", interval: float = 300.0):
+        self.stop_reconcile_loop()
+        self.reconciler = BotReconciler(self, git_config)
+        self.reconciler.start(interval)
+
+    def stop_reconcile_loop(self):
+        if self.reconciler:
+            self.reconciler.stop()
+            self.reconciler = None
+
+    def start_right_sizing(self, interval: float = 60.0):
+        self.right_sizer.start(interval)
+
+    def stop_right_sizing(self):
+        self.right_sizer.stop()
+
+    def get_resource_recommendation(self, bot_id: str) -> Optional[Dict]:
+        bot = self.bots.get(bot_id)
+        if not bot:
+            logger.error(f"Bot with ID '{bot_id}' not found.")
+            return None
+        return self.right_sizer.recommend(bot_id, bot['config'].broker)
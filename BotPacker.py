@@ -0,0 +1,165 @@
+import os
+import math
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+PACK_GROUP_LABEL = "bot-manager/pack-group"
+PACKED_BOTS_ANNOTATION = "bot-manager/packed-bots"
+
+MEMORY_SUFFIXES = {
+    "Ki": 1024, "Mi": 1024 ** 2, "Gi": 1024 ** 3, "Ti": 1024 ** 4,
+    "k": 1000, "M": 1000 ** 2, "G": 1000 ** 3, "T": 1000 ** 4,
+}
+
+CPU_SUFFIXES = {"n": 1e-9, "u": 1e-6, "m": 1e-3}
+
+def parse_cpu(quantity) -> float:
+    quantity = str(quantity)
+    if quantity[-1:] in CPU_SUFFIXES:
+        return float(quantity[:-1]) * CPU_SUFFIXES[quantity[-1]]
+    return float(quantity)
+
+def parse_memory(quantity) -> int:
+    quantity = str(quantity)
+    for suffix in sorted(MEMORY_SUFFIXES, key=len, reverse=True):
+        if quantity.endswith(suffix):
+            return int(float(quantity[:-len(suffix)]) * MEMORY_SUFFIXES[suffix])
+    return int(float(quantity))
+
+def format_cpu(cores: float) -> str:
+    return f"{max(1, math.ceil(cores * 1000))}m"
+
+def format_memory(memory: int) -> str:
+    return f"{max(1, math.ceil(memory / 1024 ** 2))}Mi"
+
+def kubernetes_name(value: str) -> str:
+    return value.lower().replace("_", "-")
+
+def member_annotation(annotation: str, bot_id: str) -> str:
+    return f"{annotation}.{bot_id}"
+
+def member_annotations(annotations: Dict[str, str], bot_id: str) -> Dict[str, str]:
+    # A packed pod keys per-bot annotations by bot ID; this returns one bot's
+    # view of them in the same shape as an unpacked pod's annotations.
+    if PACKED_BOTS_ANNOTATION not in annotations:
+        return annotations
+    suffix = f".{bot_id}"
+    return {key[:-len(suffix)]: value for key, value in annotations.items() if key.endswith(suffix)}
+
+def packed_bot_ids(pod) -> List[str]:
+    packed = (pod.metadata.annotations or {}).get(PACKED_BOTS_ANNOTATION)
+    return packed.split(",") if packed else []
+
+def member_container(pod, bot_id: str):
+    if not packed_bot_ids(pod):
+        return pod.spec.containers[0]
+    name = PackGroup.container_name(bot_id)
+    return next((container for container in pod.spec.containers if container.name == name), None)
+
+class PackGroup:
+    # One multi-container pod holding several small bots of one user and broker
+    def __init__(self, pod_name: Optional[str], namespace: str, user_id: str, broker: str):
+        self.pod_name = pod_name
+        self.namespace = namespace
+        self.user_id = user_id
+        self.broker = broker
+        self.members: Dict[str, object] = {}
+        # Whether the group's pod currently exists in the cluster
+        self.created = False
+
+    @staticmethod
+    def new(namespace: str, user_id: str, broker: str) -> "PackGroup":
+        # Named by assign_name once its first bots are placed
+        return PackGroup(None, namespace, user_id, broker)
+
+    def assign_name(self, taken: Callable[[str], bool]) -> str:
+        # Derived from the sorted member IDs, so planning the same bots always
+        # yields the same pod name; taken() rules out names already in use
+        digest = hashlib.sha1(",".join(sorted(self.members)).encode()).hexdigest()[:6]
+        base = f"bot-{self.user_id}-{kubernetes_name(self.broker)}-pack-{digest}"
+        pod_name, suffix = base, 1
+        while taken(pod_name):
+            suffix += 1
+            pod_name = f"{base}-{suffix}"
+        self.pod_name = pod_name
+        return pod_name
+
+    @staticmethod
+    def container_name(bot_id: str) -> str:
+        return f"bot-{bot_id}"
+
+class BotPacker:
+    def __init__(
+        self,
+        pod_cpu: Optional[str] = None,
+        pod_memory: Optional[str] = None,
+        max_bots_per_pod: Optional[int] = None,
+        max_bot_cpu: Optional[str] = None,
+        max_bot_memory: Optional[str] = None,
+        request_fraction: Optional[float] = None
+    ):
+        # Capacity of one packed pod, measured in container requests
+        self.pod_cpu = parse_cpu(pod_cpu or os.getenv("PACK_POD_CPU", "2"))
+        self.pod_memory = parse_memory(pod_memory or os.getenv("PACK_POD_MEMORY", "2Gi"))
+        self.max_bots_per_pod = max_bots_per_pod or int(os.getenv("PACK_MAX_BOTS_PER_POD", "8"))
+        # Bots whose limits exceed these keep a pod of their own
+        self.max_bot_cpu = parse_cpu(max_bot_cpu or os.getenv("PACK_MAX_BOT_CPU", "0.5"))
+        self.max_bot_memory = parse_memory(max_bot_memory or os.getenv("PACK_MAX_BOT_MEMORY", "512Mi"))
+        # Share of the limits requested when a bot sets no explicit requests
+        self.request_fraction = request_fraction or float(os.getenv("PACK_REQUEST_FRACTION", "0.25"))
+
+    @staticmethod
+    def _limits(bot_config) -> Tuple[float, int]:
+        limits = (bot_config.resources or {}).get("limits") or {}
+        return parse_cpu(limits.get("cpu", "0")), parse_memory(limits.get("memory", "0"))
+
+    def is_small(self, bot_config) -> bool:
+        cpu, memory = self._limits(bot_config)
+        return cpu <= self.max_bot_cpu and memory <= self.max_bot_memory
+
+    def requests(self, bot_config) -> Tuple[float, int]:
+        explicit = (bot_config.resources or {}).get("requests")
+        if explicit:
+            return parse_cpu(explicit.get("cpu", "0")), parse_memory(explicit.get("memory", "0"))
+        cpu, memory = self._limits(bot_config)
+        return cpu * self.request_fraction, int(memory * self.request_fraction)
+
+    def container_resources(self, bot_config) -> Dict:
+        cpu, memory = self.requests(bot_config)
+        resources = {key: value for key, value in (bot_config.resources or {}).items() if key != "requests"}
+        resources["requests"] = {"cpu": format_cpu(cpu), "memory": format_memory(memory)}
+        return resources
+
+    def fits(self, group: PackGroup, bot_config) -> bool:
+        members = [member for bot_id, member in group.members.items() if bot_id != bot_config.bot_id]
+        if len(members) >= self.max_bots_per_pod:
+            return False
+        cpu, memory = self.requests(bot_config)
+        for member in members:
+            member_cpu, member_memory = self.requests(member)
+            cpu += member_cpu
+            memory += member_memory
+        return cpu <= self.pod_cpu and memory <= self.pod_memory
+
+    def place(
+        self,
+        groups: List[PackGroup],
+        bot_configs: List,
+        new_group: Callable[[], PackGroup]
+    ) -> List[PackGroup]:
+        # First-fit decreasing: largest requests first, each into the first
+        # group with room, opening a new group only when none fits.
+        # Returns the groups whose membership changed, in placement order.
+        touched: List[PackGroup] = []
+        # Ties are broken by bot ID so the same bots always pack the same way
+        for bot_config in sorted(
+            bot_configs, key=lambda bot_config: (self.requests(bot_config), bot_config.bot_id), reverse=True
+        ):
+            group = next((group for group in groups if self.fits(group, bot_config)), None)
+            if group is None:
+                group = new_group()
+                groups.append(group)
+            group.members[bot_config.bot_id] = bot_config
+            if group not in touched:
+                touched.append(group)
+        return touched
@@ -0,0 +1,160 @@
+import json
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from kubernetes import client
+from kubernetes.client.exceptions import ApiException
+
+from BotPacker import member_annotations, member_container
+from ManifestTemplates import secret_manifest
+
+logger = logging.getLogger(__name__)
+
+SPEC_HASH_ANNOTATION = "bot-manager/spec-hash"
+SOURCE_COMMIT_ANNOTATION = "bot-manager/source-commit"
+BUILD_HASH_ANNOTATION = "bot-manager/build-hash"
+REPOSITORY_ANNOTATION = "bot-manager/repository-url"
+
+_serializer = client.ApiClient()
+
+def manifest_hash(manifest) -> str:
+    # Template manifests are plain dicts already in serialized form
+    serialized = manifest if isinstance(manifest, dict) else _serializer.sanitize_for_serialization(manifest)
+    return hashlib.sha256(json.dumps(serialized, sort_keys=True).encode()).hexdigest()[:16]
+
+def build_hash(build_parameters: Dict) -> str:
+    return hashlib.sha256(json.dumps(build_parameters or {}, sort_keys=True).encode()).hexdigest()[:16]
+
+class BotReconciler:
+    def __init__(self, bot_manager, git_config, max_workers: int = 16):
+        self.bot_manager = bot_manager
+        self.git_config = git_config
+        self.max_workers = max_workers
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _read_or_none(self, read, *args):
+        try:
+            return read(*args)
+        except ApiException as api_exception:
+            if api_exception.status == 404:
+                return None
+            raise
+
+    def _reconcile_secret(self, bot_config, namespace: str, actions: List[str]):
+        core_api = self.bot_manager.kubernetes_core_api
+        secret_name = self.bot_manager.secret_name(bot_config)
+        desired = {k: str(v) for k, v in bot_config.broker_config.items() if v is not None}
+        live = self._read_or_none(core_api.read_namespaced_secret, secret_name, namespace)
+        if live is None:
+            self.bot_manager.create_secret(namespace, bot_config.broker_config, secret_name)
+            actions.append("secret-created")
+            return
+        live_data = {k: base64.b64decode(v).decode() for k, v in (live.data or {}).items()}
+        if live_data != desired:
+            # Replace rather than patch so keys dropped from the config go away
+            secret = secret_manifest(secret_name, desired, resource_version=live.metadata.resource_version)
+            core_api.replace_namespaced_secret(secret_name, namespace, secret)
+            actions.append("secret-updated")
+
+    def _reconcile_image(self, bot_config, live_pod, resolved_commits: Dict[str, Optional[str]], actions: List[str]):
+        repository_url = bot_config.repository_url
+        if repository_url not in resolved_commits:
+            resolved_commits[repository_url] = self.git_config.resolve_revision(repository_url)
+        commit_sha = resolved_commits[repository_url]
+
+        live_container = member_container(live_pod, bot_config.bot_id) if live_pod is not None else None
+        if live_container is not None and commit_sha:
+            annotations = member_annotations(live_pod.metadata.annotations or {}, bot_config.bot_id)
+            if (
+                annotations.get(SOURCE_COMMIT_ANNOTATION) == commit_sha
+                and annotations.get(BUILD_HASH_ANNOTATION) == build_hash(bot_config.build_parameters)
+            ):
+                bot_config.image = live_container.image
+                bot_config.source_commit = commit_sha
+                return
+
+        repository_path = self.bot_manager.clone_bot_repository(bot_config, self.git_config, commit_sha)
+        try:
+            self.bot_manager.build_bot_image(bot_config, repository_path)
+        finally:
+            self.git_config.release_repository(repository_path)
+        actions.append("image-built")
+
+    def reconcile(self, bot_config, namespace: str, resolved_commits: Optional[Dict[str, Optional[str]]] = None) -> Dict:
+        core_api = self.bot_manager.kubernetes_core_api
+        pod_name, _ = self.bot_manager.bot_placement(bot_config.bot_id)
+        actions: List[str] = []
+
+        if self._read_or_none(core_api.read_namespace, namespace) is None:
+            self.bot_manager.namespace_lost(namespace)
+            namespace = self.bot_manager.provision_bot_namespace(bot_config)
+            actions.append("namespace-provisioned")
+        else:
+            self._reconcile_secret(bot_config, namespace, actions)
+
+        live_pod = self._read_or_none(core_api.read_namespaced_pod, pod_name, namespace)
+        self._reconcile_image(bot_config, live_pod, resolved_commits if resolved_commits is not None else {}, actions)
+
+        if self.bot_manager.right_sizer.apply_recommendation(bot_config):
+            actions.append("resources-resized")
+        desired_hash = self.bot_manager.desired_spec_hash(bot_config, namespace)
+        live_hash = None
+        if live_pod is not None:
+            live_hash = member_annotations(live_pod.metadata.annotations or {}, bot_config.bot_id).get(SPEC_HASH_ANNOTATION)
+        if live_hash != desired_hash:
+            self.bot_manager.redeploy_bot_pod(bot_config, namespace, live_pod is not None)
+            actions.append("pod-recreated" if live_pod is not None else "pod-created")
+
+        if actions:
+            logger.info(f"Reconciled bot '{bot_config.bot_id}': {', '.join(actions)}.")
+        return {'bot_id': bot_config.bot_id, 'namespace': namespace, 'actions': actions, 'error': None}
+
+    def reconcile_all(self, bot_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        bots = self.bot_manager.list_bots()
+        selected = [bot_id for bot_id in (bot_ids or list(bots)) if bot_id in bots]
+        # One remote lookup per repository per pass, shared by every bot built from it
+        resolved_commits: Dict[str, Optional[str]] = {}
+        for bot_id in selected:
+            repository_url = bots[bot_id]['config'].repository_url
+            if repository_url not in resolved_commits:
+                resolved_commits[repository_url] = self.git_config.resolve_revision(repository_url)
+
+        def reconcile_one(bot_id: str) -> Dict:
+            bot = bots[bot_id]
+            try:
+                result = self.reconcile(bot['config'], bot['namespace'], resolved_commits)
+                bot['namespace'] = result['namespace']
+                self.bot_manager.persist_bot(bot_id)
+                return result
+            except Exception as exception:
+                logger.error(f"Failed to reconcile bot '{bot_id}': {exception}")
+                return {'bot_id': bot_id, 'namespace': bot['namespace'], 'actions': [], 'error': exception}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(selected, executor.map(reconcile_one, selected)))
+
+    def start(self, interval: float = 300.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+
+        def run():
+            while not self._stopped.wait(interval):
+                try:
+                    self.reconcile_all()
+                except Exception as exception:
+                    logger.error(f"Reconcile pass failed: {exception}")
+
+        self._thread = threading.Thread(target=run, name="bot-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
@@ -0,0 +1,109 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bots (
+    bot_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    broker TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    repository_url TEXT NOT NULL,
+    image TEXT,
+    source_commit TEXT,
+    resources TEXT,
+    build_parameters TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bots_user_id ON bots (user_id);
+CREATE INDEX IF NOT EXISTS bots_broker ON bots (broker);
+CREATE INDEX IF NOT EXISTS bots_namespace ON bots (namespace);
+"""
+
+class BotRegistry:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        # WAL keeps readers from blocking the single writer
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        record['resources'] = json.loads(record['resources']) if record['resources'] else None
+        record['build_parameters'] = json.loads(record['build_parameters']) if record['build_parameters'] else {}
+        return record
+
+    def upsert(self, bot_config, namespace: str):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO bots (
+                    bot_id, user_id, broker, namespace, repository_url, image,
+                    source_commit, resources, build_parameters, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bot_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    broker = excluded.broker,
+                    namespace = excluded.namespace,
+                    repository_url = excluded.repository_url,
+                    image = excluded.image,
+                    source_commit = excluded.source_commit,
+                    resources = excluded.resources,
+                    build_parameters = excluded.build_parameters,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    bot_config.bot_id,
+                    bot_config.user_id,
+                    bot_config.broker,
+                    namespace,
+                    bot_config.repository_url,
+                    bot_config.image,
+                    bot_config.source_commit,
+                    json.dumps(bot_config.resources),
+                    json.dumps(bot_config.build_parameters),
+                    now,
+                    now,
+                ),
+            )
+
+    def delete(self, bot_id: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM bots WHERE bot_id = ?", (bot_id,))
+
+    def _select(self, where: str = "", parameters: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self._connection.execute(f"SELECT * FROM bots {where}", parameters).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get(self, bot_id: str) -> Optional[Dict]:
+        records = self._select("WHERE bot_id = ?", (bot_id,))
+        return records[0] if records else None
+
+    def all(self) -> List[Dict]:
+        return self._select()
+
+    def by_user(self, user_id: str) -> List[Dict]:
+        return self._select("WHERE user_id = ?", (user_id,))
+
+    def by_broker(self, broker: str) -> List[Dict]:
+        return self._select("WHERE broker = ?", (broker,))
+
+    def by_namespace(self, namespace: str) -> List[Dict]:
+        return self._select("WHERE namespace = ?", (namespace,))
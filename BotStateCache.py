@@ -0,0 +1,208 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from kubernetes.client.exceptions import ApiException
+
+from BotPacker import PackGroup, packed_bot_ids
+
+logger = logging.getLogger(__name__)
+
+class BotStateCache:
+    def __init__(self, backend, label_selector: str = "app=bot", watch_timeout: int = 300):
+        self.backend = backend
+        self.label_selector = label_selector
+        self.watch_timeout = watch_timeout
+        self.resource_version: Optional[str] = None
+
+        self._states: Dict[str, Dict] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self._by_namespace: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch = None
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[str, Dict], None]] = []
+
+    @property
+    def kubernetes_core_api(self):
+        return self.backend.core_api
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="bot-state-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def add_listener(self, listener: Callable[[str, Dict], None]):
+        # Called with (event type, pod state) for every watched pod event
+        self._listeners.append(listener)
+
+    def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        return self._synced.wait(timeout)
+
+    def get(self, bot_id: str) -> Optional[Dict]:
+        state = self._states.get(bot_id)
+        return dict(state) if state else None
+
+    def bot_ids_for_user(self, user_id: str) -> Set[str]:
+        with self._lock:
+            return set(self._by_user.get(user_id, ()))
+
+    def bot_ids_in_namespace(self, namespace: str) -> Set[str]:
+        with self._lock:
+            return set(self._by_namespace.get(namespace, ()))
+
+    def states(self, bot_ids: Optional[Set[str]] = None) -> List[Dict]:
+        with self._lock:
+            if bot_ids is None:
+                return [dict(state) for state in self._states.values()]
+            return [dict(self._states[bot_id]) for bot_id in bot_ids if bot_id in self._states]
+
+    @staticmethod
+    def pod_states(pod) -> List[Dict]:
+        # A packed pod reports one state per bot, from that bot's container
+        bot_ids = packed_bot_ids(pod)
+        if not bot_ids:
+            return [BotStateCache.pod_state(pod)]
+        return [BotStateCache.pod_state(pod, bot_id, PackGroup.container_name(bot_id)) for bot_id in bot_ids]
+
+    @staticmethod
+    def pod_state(pod, bot_id: Optional[str] = None, container_name: Optional[str] = None) -> Dict:
+        labels = pod.metadata.labels or {}
+        status = pod.status
+        reason = status.reason if status else None
+        restart_count = 0
+        for container_status in (status.container_statuses or []) if status else []:
+            if container_name and container_status.name != container_name:
+                continue
+            restart_count += container_status.restart_count or 0
+            state = container_status.state
+            last_state = container_status.last_state
+            if state and state.waiting and state.waiting.reason:
+                reason = state.waiting.reason
+            elif state and state.terminated and state.terminated.reason:
+                reason = state.terminated.reason
+            elif last_state and last_state.terminated and last_state.terminated.reason:
+                reason = last_state.terminated.reason
+        return {
+            'bot_id': bot_id or labels.get('bot_id'),
+            'user_id': labels.get('user_id'),
+            'namespace': pod.metadata.namespace,
+            'pod_name': pod.metadata.name,
+            'phase': status.phase if status else None,
+            'reason': reason,
+            'restart_count': restart_count,
+            'node': pod.spec.node_name if pod.spec else None,
+            'created_at': pod.metadata.creation_timestamp,
+            'started_at': status.start_time if status else None,
+            'updated_at': time.time(),
+        }
+
+    def _index(self, state: Dict):
+        bot_id = state['bot_id']
+        previous = self._states.get(bot_id)
+        if previous:
+            self._unindex(previous)
+        self._states[bot_id] = state
+        if state['user_id']:
+            self._by_user.setdefault(state['user_id'], set()).add(bot_id)
+        self._by_namespace.setdefault(state['namespace'], set()).add(bot_id)
+
+    def _unindex(self, state: Dict):
+        bot_id = state['bot_id']
+        self._states.pop(bot_id, None)
+        for index, key in ((self._by_user, state['user_id']), (self._by_namespace, state['namespace'])):
+            bot_ids = index.get(key)
+            if bot_ids is not None:
+                bot_ids.discard(bot_id)
+                if not bot_ids:
+                    del index[key]
+
+    def _relist(self):
+        pod_list = self.kubernetes_core_api.list_pod_for_all_namespaces(label_selector=self.label_selector)
+        with self._lock:
+            self._states.clear()
+            self._by_user.clear()
+            self._by_namespace.clear()
+            for pod in pod_list.items:
+                for state in self.pod_states(pod):
+                    if state['bot_id']:
+                        self._index(state)
+        self.resource_version = pod_list.metadata.resource_version
+        self._synced.set()
+        logger.info(f"Bot state cache synced with {len(pod_list.items)} pods.")
+
+    def _apply(self, event_type: str, pod):
+        states = [state for state in self.pod_states(pod) if state['bot_id']]
+        with self._lock:
+            for state in states:
+                current = self._states.get(state['bot_id'])
+                if event_type == 'DELETED':
+                    # A redeploy or repack may already have moved the bot to another pod
+                    if current and (current['namespace'], current['pod_name']) == (state['namespace'], state['pod_name']):
+                        self._unindex(current)
+                else:
+                    self._index(state)
+        for state in states:
+            for listener in self._listeners:
+                try:
+                    listener(event_type, state)
+                except Exception as exception:
+                    logger.warning(f"Bot state listener failed: {exception}")
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch = self.backend.watch()
+                for event in self._watch.stream(
+                    self.kubernetes_core_api.list_pod_for_all_namespaces,
+                    label_selector=self.label_selector,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.watch_timeout,
+                    allow_watch_bookmarks=True,
+                ):
+                    if event['type'] == 'ERROR':
+                        if event['raw_object'].get('code') == 410:
+                            self.resource_version = None
+                        break
+                    if event['type'] == 'BOOKMARK':
+                        # Bookmarks arrive as raw dicts, not deserialized pods
+                        self.resource_version = event['raw_object']['metadata']['resourceVersion']
+                        continue
+                    pod = event['object']
+                    self.resource_version = pod.metadata.resource_version
+                    self._apply(event['type'], pod)
+                backoff = 1
+            except ApiException as api_exception:
+                if api_exception.status == 410:
+                    logger.info("Bot state cache resource version expired, relisting.")
+                    self.resource_version = None
+                    continue
+                logger.warning(f"Bot state cache watch failed: {api_exception}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            except Exception as exception:
+                if self._stopped.is_set():
+                    break
+                logger.warning(f"Bot state cache watch interrupted: {exception}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
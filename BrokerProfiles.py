@@ -0,0 +1,208 @@
+import os
+import json
+import base64
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import yaml
+from kubernetes.client.exceptions import ApiException
+
+logger = logging.getLogger(__name__)
+
+class Field:
+    # One broker config key: read from a credential source by env_var name,
+    # or a fixed value when env_var is None
+    __slots__ = ("key", "env_var", "default", "convert")
+
+    def __init__(self, key: str, env_var: Optional[str] = None, default=None, convert=None):
+        self.key = key
+        self.env_var = env_var
+        self.default = default
+        self.convert = convert
+
+def _is_true(value: str) -> bool:
+    return value.lower() == "true"
+
+class EnvCredentialSource:
+    def get(self, broker: str, env_var: str) -> Optional[str]:
+        return os.getenv(env_var)
+
+class FileCredentialSource:
+    # YAML or JSON file mapping broker name -> {ENV_VAR_NAME: value}
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def get(self, broker: str, env_var: str) -> Optional[str]:
+        with self._lock:
+            if self._data is None:
+                with open(self.path) as file:
+                    self._data = (json.load(file) if self.path.endswith(".json") else yaml.safe_load(file)) or {}
+        value = (self._data.get(broker) or {}).get(env_var)
+        return None if value is None else str(value)
+
+class KubernetesSecretCredentialSource:
+    # One secret per broker, e.g. broker-credentials-alpaca, keyed by env var name
+    def __init__(self, kubernetes_core_api, namespace: Optional[str] = None, name_prefix: str = "broker-credentials-"):
+        self.kubernetes_core_api = kubernetes_core_api
+        self.namespace = namespace or os.getenv("BROKER_CREDENTIALS_NAMESPACE", "bot-manager")
+        self.name_prefix = name_prefix
+        self._secrets: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _secret(self, broker: str) -> Dict[str, str]:
+        with self._lock:
+            if broker not in self._secrets:
+                name = self.name_prefix + broker.replace("_", "-")
+                try:
+                    secret = self.kubernetes_core_api.read_namespaced_secret(name, self.namespace)
+                    self._secrets[broker] = {
+                        key: base64.b64decode(value).decode() for key, value in (secret.data or {}).items()
+                    }
+                except ApiException as api_exception:
+                    if api_exception.status != 404:
+                        raise
+                    self._secrets[broker] = {}
+            return self._secrets[broker]
+
+    def get(self, broker: str, env_var: str) -> Optional[str]:
+        return self._secret(broker).get(env_var)
+
+def default_credential_sources() -> List:
+    sources = []
+    if os.getenv("BROKER_CREDENTIALS_FILE"):
+        sources.append(FileCredentialSource(os.getenv("BROKER_CREDENTIALS_FILE")))
+    sources.append(EnvCredentialSource())
+    return sources
+
+_credential_sources: Optional[List] = None
+_sources_lock = threading.Lock()
+
+def set_credential_sources(sources: List):
+    # First source with a value wins; resolved configs are dropped so the
+    # next access reads from the new sources
+    global _credential_sources
+    with _sources_lock:
+        _credential_sources = list(sources)
+    reload_credentials()
+
+def credential_sources() -> List:
+    global _credential_sources
+    with _sources_lock:
+        if _credential_sources is None:
+            _credential_sources = default_credential_sources()
+        return _credential_sources
+
+def reload_credentials():
+    for profile in broker_profiles().values():
+        profile.reset()
+
+class BrokerProfile:
+    __slots__ = ("name", "fields", "resources", "build_parameters", "_config", "_lock")
+
+    def __init__(self, name: str, fields: Tuple[Field, ...], resources: Dict, build_parameters: Optional[Dict] = None):
+        self.name = name
+        self.fields = fields
+        # Templates: every bot gets its own copy
+        self.resources = resources
+        self.build_parameters = build_parameters or {}
+        self._config: Optional[Mapping] = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._config = None
+
+    def config(self) -> Mapping:
+        # Resolved on first use and shared read-only by every bot on the profile
+        config = self._config
+        if config is not None:
+            return config
+        with self._lock:
+            if self._config is None:
+                sources = credential_sources()
+                resolved = {}
+                for field in self.fields:
+                    value = None
+                    if field.env_var:
+                        value = next(
+                            (found for found in (source.get(self.name, field.env_var) for source in sources)
+                             if found is not None),
+                            None
+                        )
+                    if value is None:
+                        value = field.default
+                    if value is not None and field.convert:
+                        value = field.convert(value)
+                    resolved[field.key] = value
+                self._config = MappingProxyType(resolved)
+            return self._config
+
+def _default_resources() -> Dict:
+    return {
+        "limits": {
+            "cpu": os.getenv("CPU_LIMIT", "0.5"),
+            "memory": os.getenv("MEMORY_LIMIT", "512Mi"),
+        }
+    }
+
+def _build_profiles() -> Dict[str, BrokerProfile]:
+    default_resources = _default_resources()
+    profiles = (
+        BrokerProfile("alpaca", (
+            Field("API_KEY", "ALPACA_API_KEY"),
+            Field("API_SECRET", "ALPACA_API_SECRET"),
+            Field("PAPER", "ALPACA_IS_PAPER", "true", _is_true),
+        ), default_resources),
+        BrokerProfile("tradier", (
+            Field("ACCESS_TOKEN", "TRADIER_ACCESS_TOKEN"),
+            Field("ACCOUNT_NUMBER", "TRADIER_ACCOUNT_NUMBER"),
+            Field("PAPER", "TRADIER_IS_PAPER", "true", _is_true),
+        ), default_resources),
+        BrokerProfile("kraken", (
+            Field("exchange_id", default="kraken"),
+            Field("apiKey", "KRAKEN_API_KEY"),
+            Field("secret", "KRAKEN_API_SECRET"),
+            Field("margin", default=True),
+            Field("sandbox", default=False),
+        ), default_resources),
+        BrokerProfile("coinbase", (
+            Field("exchange_id", default="coinbase"),
+            Field("apiKey", "COINBASE_API_KEY"),
+            Field("secret", "COINBASE_API_SECRET"),
+            Field("margin", default=False),
+            Field("sandbox", default=False),
+        ), default_resources),
+        BrokerProfile("interactive_brokers", (
+            Field("IB_USERNAME", "IB_USERNAME"),
+            Field("IB_PASSWORD", "IB_PASSWORD"),
+            Field("ACCOUNT_ID", "ACCOUNT_ID"),
+            Field("API_URL"),
+            Field("RUNNING_ON_SERVER", default=True),
+        ), {"limits": {"cpu": "1", "memory": "1Gi"}}, {"IB_USERNAME": "True"}),
+    )
+    return {profile.name: profile for profile in profiles}
+
+_profiles: Optional[Dict[str, BrokerProfile]] = None
+_profiles_lock = threading.Lock()
+
+def broker_profiles() -> Dict[str, BrokerProfile]:
+    # Built on first use so CPU_LIMIT/MEMORY_LIMIT are read once per process
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = _build_profiles()
+        return _profiles
+
+def register_broker_profile(profile: BrokerProfile):
+    broker_profiles()[profile.name] = profile
+
+def get_broker_profile(broker: str) -> BrokerProfile:
+    profile = broker_profiles().get(broker)
+    if profile is None:
+        logger.error(f"Unsupported broker: {broker}")
+        raise ValueError("Unsupported broker specified.")
+    return profile
@@ -0,0 +1,67 @@
+import os
+import logging
+from typing import IO, Dict, List, Optional
+
+from docker.errors import BuildError
+from docker.utils.build import tar
+
+logger = logging.getLogger(__name__)
+
+# Never part of an image, whatever the repository's .dockerignore says
+ALWAYS_EXCLUDED = [".git", "**/.git"]
+
+def dockerignore_patterns(repository_path: str) -> List[str]:
+    dockerignore = os.path.join(repository_path, ".dockerignore")
+    patterns = []
+    if os.path.exists(dockerignore):
+        with open(dockerignore) as file:
+            patterns = [
+                line.strip() for line in file.read().splitlines()
+                if line.strip() and not line.strip().startswith("#")
+            ]
+    return patterns + ALWAYS_EXCLUDED
+
+def build_context(repository_path: str, dockerfile: Optional[str] = None) -> IO:
+    # Gzipped tar spooled to a temporary file, so large repositories are
+    # neither held in memory nor uploaded uncompressed.
+    context = tar(
+        repository_path,
+        exclude=dockerignore_patterns(repository_path),
+        dockerfile=dockerfile,
+        gzip=True
+    )
+    context.seek(0, os.SEEK_END)
+    logger.info(f"Build context for '{repository_path}' is {context.tell() / 1024:.1f} KiB compressed.")
+    context.seek(0)
+    return context
+
+def stream_build(
+    docker_client,
+    repository_path: str,
+    tag: str,
+    buildargs: Optional[Dict],
+    log_buffer
+):
+    # Same contract as images.build(), but build output is consumed as it
+    # arrives into a bounded buffer instead of being accumulated in memory.
+    context = build_context(repository_path)
+    try:
+        for chunk in docker_client.api.build(
+            fileobj=context,
+            custom_context=True,
+            encoding="gzip",
+            tag=tag,
+            buildargs=buildargs,
+            rm=True,
+            decode=True
+        ):
+            if "stream" in chunk:
+                for line in chunk["stream"].splitlines():
+                    if line.strip():
+                        log_buffer.append(line)
+            if "error" in chunk:
+                log_buffer.append(chunk["error"].strip())
+                raise BuildError(chunk["error"], log_buffer.lines())
+    finally:
+        context.close()
+    return docker_client.images.get(tag)
@@ -0,0 +1,205 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_LIVE = 0
+PRIORITY_PAPER = 10
+
+def build_priority(bot_config) -> int:
+    broker_config = bot_config.broker_config or {}
+    if broker_config.get("PAPER") or broker_config.get("sandbox"):
+        return PRIORITY_PAPER
+    return PRIORITY_LIVE
+
+class BuildJob:
+    def __init__(self, bot_id: str, user_id: str, priority: int, sequence: int, build: Callable):
+        self.bot_id = bot_id
+        self.user_id = user_id
+        self.priority = priority
+        self.sequence = sequence
+        self.build = build
+        self.future: Future = Future()
+        self.queued_at = time.time()
+        self.discarded = False
+
+    def __lt__(self, other: "BuildJob") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+class BuildScheduler:
+    def __init__(self, max_concurrent_builds: Optional[int] = None, observer: Optional[Callable] = None):
+        self.max_concurrent_builds = max_concurrent_builds or int(os.getenv("BUILD_MAX_CONCURRENT", "4"))
+        # Called with (queue depth, wait seconds or None) whenever either changes
+        self.observer = observer
+        # user_id -> heap of that user's queued jobs
+        self._queues: Dict[str, List[BuildJob]] = {}
+        # bot_id -> its newest queued job, so a resubmit can cancel it
+        self._queued_by_bot: Dict[str, BuildJob] = {}
+        self._running_by_user: Dict[str, int] = {}
+        # user_id -> dispatch counter value when the user last got a slot
+        self._last_served: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._dispatches = itertools.count()
+        self._depth = 0
+        self._running = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._waits: deque = deque(maxlen=1000)
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_concurrent_builds:
+            worker = threading.Thread(
+                target=self._run, name=f"build-worker-{len(self._workers)}", daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _notify_observer(self, wait: Optional[float] = None):
+        if self.observer:
+            self.observer(self._depth, wait)
+
+    def _discard(self, job: BuildJob):
+        # Counts a cancelled job out of the queue exactly once
+        if not job.discarded:
+            job.discarded = True
+            self._depth -= 1
+            self._cancelled += 1
+
+    def submit(self, bot_config, build: Callable, priority: Optional[int] = None) -> Future:
+        job = BuildJob(
+            bot_config.bot_id,
+            bot_config.user_id,
+            build_priority(bot_config) if priority is None else priority,
+            next(self._sequence),
+            build
+        )
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Build scheduler is stopped.")
+            superseded = self._queued_by_bot.get(job.bot_id)
+            if superseded is not None and superseded.future.cancel():
+                # The stale job stays in its heap and is dropped when popped
+                self._discard(superseded)
+                logger.info(f"Queued build for bot '{job.bot_id}' superseded by a newer request.")
+            self._queued_by_bot[job.bot_id] = job
+            heapq.heappush(self._queues.setdefault(job.user_id, []), job)
+            self._depth += 1
+            self._start_workers()
+            self._condition.notify()
+            self._notify_observer()
+        return job.future
+
+    def cancel(self, bot_id: str) -> bool:
+        with self._condition:
+            job = self._queued_by_bot.pop(bot_id, None)
+            if job is None or not job.future.cancel():
+                return False
+            self._discard(job)
+            self._notify_observer()
+        logger.info(f"Queued build for bot '{bot_id}' cancelled.")
+        return True
+
+    def _next_job(self) -> Optional[BuildJob]:
+        # Best priority class first; within it the user with the fewest running
+        # builds who was served longest ago, so one user's burst cannot starve others.
+        best_key, best_user = None, None
+        for user_id, jobs in self._queues.items():
+            while jobs and jobs[0].future.cancelled():
+                self._discard(heapq.heappop(jobs))
+            if not jobs:
+                continue
+            key = (
+                jobs[0].priority,
+                self._running_by_user.get(user_id, 0),
+                self._last_served.get(user_id, -1),
+                jobs[0].sequence,
+            )
+            if best_key is None or key < best_key:
+                best_key, best_user = key, user_id
+        for user_id in [user_id for user_id, jobs in self._queues.items() if not jobs]:
+            del self._queues[user_id]
+        if best_user is None:
+            return None
+        job = heapq.heappop(self._queues[best_user])
+        if self._queued_by_bot.get(job.bot_id) is job:
+            del self._queued_by_bot[job.bot_id]
+        self._last_served[best_user] = next(self._dispatches)
+        return job
+
+    def _run(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    if self._stopped:
+                        return
+                    self._condition.wait()
+                    job = self._next_job()
+                if not job.future.set_running_or_notify_cancel():
+                    self._discard(job)
+                    continue
+                wait = time.time() - job.queued_at
+                self._depth -= 1
+                self._running += 1
+                self._running_by_user[job.user_id] = self._running_by_user.get(job.user_id, 0) + 1
+                self._waits.append(wait)
+                self._notify_observer(wait)
+
+            try:
+                job.future.set_result(job.build())
+            except BaseException as exception:
+                job.future.set_exception(exception)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._completed += 1
+                    self._running_by_user[job.user_id] -= 1
+                    if not self._running_by_user[job.user_id]:
+                        del self._running_by_user[job.user_id]
+
+    def stats(self) -> Dict:
+        with self._condition:
+            waits = sorted(self._waits)
+            queued_by_user = {
+                user_id: sum(1 for job in jobs if not job.future.cancelled())
+                for user_id, jobs in self._queues.items()
+            }
+            stats = {
+                'queue_depth': self._depth,
+                'running': self._running,
+                'max_concurrent_builds': self.max_concurrent_builds,
+                'completed': self._completed,
+                'cancelled': self._cancelled,
+                'queued_by_user': {user_id: count for user_id, count in queued_by_user.items() if count},
+            }
+        stats['wait_seconds'] = {
+            'p50': round(waits[len(waits) // 2], 6) if waits else 0.0,
+            'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 6) if waits else 0.0,
+            'max': round(waits[-1], 6) if waits else 0.0,
+        }
+        return stats
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            for jobs in self._queues.values():
+                for job in jobs:
+                    if job.future.cancel():
+                        self._discard(job)
+            self._queues.clear()
+            self._queued_by_bot.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._workers = []
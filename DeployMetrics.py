@@ -0,0 +1,129 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class DeployMetrics:
+    def __init__(self, registry: Optional[CollectorRegistry] = None, max_traces: int = 1000):
+        self.registry = registry or CollectorRegistry()
+        self.max_traces = max_traces
+        self.stage_seconds = Histogram(
+            "bot_deploy_stage_seconds", "Time spent in each deploy stage.",
+            ["stage"], registry=self.registry, buckets=STAGE_BUCKETS
+        )
+        self.deploys_total = Counter(
+            "bot_deploys_total", "Bot deploys by outcome.",
+            ["outcome"], registry=self.registry
+        )
+        self.stage_failures_total = Counter(
+            "bot_deploy_stage_failures_total", "Deploy failures by the stage that failed.",
+            ["stage"], registry=self.registry
+        )
+        self.api_call_seconds = Histogram(
+            "kubernetes_api_call_seconds", "Kubernetes API call latency by verb.",
+            ["verb", "outcome"], registry=self.registry, buckets=API_BUCKETS
+        )
+        self.time_to_running_seconds = Histogram(
+            "bot_time_to_running_seconds", "Time from pod creation until the pod reports Running.",
+            registry=self.registry, buckets=STAGE_BUCKETS
+        )
+        self.build_queue_depth = Gauge(
+            "bot_build_queue_depth", "Image builds waiting for a build slot.",
+            registry=self.registry
+        )
+        self.build_queue_wait_seconds = Histogram(
+            "bot_build_queue_wait_seconds", "Time an image build waited for a build slot.",
+            registry=self.registry, buckets=STAGE_BUCKETS
+        )
+        # bot_id -> list of spans, oldest bots dropped past max_traces
+        self._traces: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._pods_created: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _add_span(self, bot_id: str, span: Dict):
+        with self._lock:
+            spans = self._traces.setdefault(bot_id, [])
+            self._traces.move_to_end(bot_id)
+            spans.append(span)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    @contextmanager
+    def stage(self, bot_id: str, stage: str):
+        started = time.time()
+        error = None
+        try:
+            yield
+        except Exception as exception:
+            error = str(exception)
+            self.stage_failures_total.labels(stage).inc()
+            raise
+        finally:
+            duration = time.time() - started
+            self.stage_seconds.labels(stage).observe(duration)
+            self._add_span(bot_id, {
+                'stage': stage,
+                'started_at': started,
+                'duration': round(duration, 6),
+                'error': error,
+            })
+
+    def deploy_started(self, bot_id: str):
+        with self._lock:
+            self._traces.pop(bot_id, None)
+
+    def deploy_finished(self, bot_id: str, succeeded: bool):
+        self.deploys_total.labels("succeeded" if succeeded else "failed").inc()
+        logger.info(f"Deploy trace for bot '{bot_id}': {json.dumps(self.trace(bot_id))}")
+
+    def pod_created(self, bot_id: str):
+        with self._lock:
+            self._pods_created[bot_id] = time.time()
+
+    def forget(self, bot_id: str):
+        with self._lock:
+            self._pods_created.pop(bot_id, None)
+
+    def observe_pod_state(self, event_type: str, state: Dict):
+        # Fed by the bot state cache; closes the time-to-Running span
+        if state.get('phase') != 'Running':
+            return
+        with self._lock:
+            created = self._pods_created.pop(state['bot_id'], None)
+        if created is None:
+            return
+        duration = time.time() - created
+        self.time_to_running_seconds.observe(duration)
+        self._add_span(state['bot_id'], {
+            'stage': 'running',
+            'started_at': created,
+            'duration': round(duration, 6),
+            'error': None,
+        })
+
+    def observe_api_call(self, method_name: str, duration: float, succeeded: bool):
+        verb = method_name.split("_", 1)[0]
+        self.api_call_seconds.labels(verb, "success" if succeeded else "error").observe(duration)
+
+    def observe_build_queue(self, depth: int, wait: Optional[float] = None):
+        self.build_queue_depth.set(depth)
+        if wait is not None:
+            self.build_queue_wait_seconds.observe(wait)
+
+    def trace(self, bot_id: str) -> List[Dict]:
+        with self._lock:
+            return [dict(span) for span in self._traces.get(bot_id, [])]
+
+    def serve(self, port: int, address: str = "0.0.0.0"):
+        start_http_server(port, address, registry=self.registry)
+        logger.info(f"Serving Prometheus metrics on {address}:{port}.")
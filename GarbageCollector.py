@@ -0,0 +1,104 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from NamespacePool import POOL_LABEL
+
+logger = logging.getLogger(__name__)
+
+def _created_at(namespace) -> float:
+    created = namespace.metadata.creation_timestamp
+    if created is None:
+        return 0.0
+    if isinstance(created, str):
+        created = datetime.strptime(created, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    return created.timestamp()
+
+class GarbageCollector:
+    def __init__(
+        self,
+        bot_manager,
+        batch_size: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        min_age: Optional[float] = None,
+        propagation_policy: str = "Background"
+    ):
+        self.bot_manager = bot_manager
+        self.batch_size = batch_size or int(os.getenv("GC_BATCH_SIZE", "20"))
+        # Pause between batches so a large sweep does not flood the API server
+        self.batch_interval = batch_interval if batch_interval is not None else float(os.getenv("GC_BATCH_INTERVAL", "5"))
+        # Namespaces younger than this may belong to a deploy still in flight
+        self.min_age = min_age if min_age is not None else float(os.getenv("GC_MIN_AGE", "600"))
+        self.propagation_policy = propagation_policy
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def find_orphans(self) -> List[str]:
+        core_api = self.bot_manager.kubernetes_core_api
+        known = {bot['namespace'] for bot in list(self.bot_manager.bots.values())}
+        if self.bot_manager.registry:
+            known |= {record['namespace'] for record in self.bot_manager.registry.all()}
+        occupied = {
+            pod.metadata.namespace
+            for pod in core_api.list_pod_for_all_namespaces(label_selector="app=bot").items
+            if not pod.status or pod.status.phase not in ("Succeeded", "Failed")
+        }
+        cutoff = time.time() - self.min_age
+        orphans = []
+        for namespace in core_api.list_namespace().items:
+            name = namespace.metadata.name
+            labels = namespace.metadata.labels or {}
+            if not name.startswith("bot-") or name in known or name in occupied:
+                continue
+            # Unclaimed pool namespaces are kept on purpose
+            if labels.get(POOL_LABEL) in ("available", "provisioning"):
+                continue
+            if namespace.status and namespace.status.phase == "Terminating":
+                continue
+            if _created_at(namespace) > cutoff:
+                continue
+            orphans.append(name)
+        return orphans
+
+    def collect(self, dry_run: bool = False) -> List[str]:
+        orphans = self.find_orphans()
+        if dry_run or not orphans:
+            logger.info(f"Garbage collection found {len(orphans)} orphaned namespaces{' (dry run)' if dry_run else ''}.")
+            return orphans
+        deleted = []
+        for start in range(0, len(orphans), self.batch_size):
+            batch = orphans[start:start + self.batch_size]
+            try:
+                errors = self.bot_manager.delete_namespaces(batch, self.propagation_policy)
+                deleted.extend(namespace for namespace, error in errors.items() if error is None)
+            except TimeoutError as timeout_error:
+                logger.warning(f"Garbage collection batch did not finish: {timeout_error}")
+                deleted.extend(batch)
+            if start + self.batch_size < len(orphans) and self._stopped.wait(self.batch_interval):
+                break
+        logger.info(f"Garbage collection reclaimed {len(deleted)}/{len(orphans)} orphaned namespaces.")
+        return deleted
+
+    def start(self, interval: float = 3600.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+
+        def run():
+            while not self._stopped.wait(interval):
+                try:
+                    self.collect()
+                except Exception as exception:
+                    logger.error(f"Garbage collection failed: {exception}")
+
+        self._thread = threading.Thread(target=run, name="garbage-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
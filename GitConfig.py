@@ -8,20 +8,27 @@ class GitConfig:
     def __init__(self, authentication_token: str, repo_path: str = "./repos",
                  repository_url: str = "https://github.com/your-org/your-bot-repo.git",
                  organization_name: str = "your-org",
-                 team_name: str = "your-team"):
+                 team_name: str = "your-team",
+                 partial_clone: Optional[bool] = None):
         self.authentication_token = authentication_token
         self.repo_path = repo_path
         self.organization_name = organization_name
         self.team_name = team_name
+        # None follows GIT_PARTIAL_CLONE
+        self.partial_clone = partial_clone
 
-    def clone_repository(self, repository_url) -> Optional[str]:
+    def _github_client(self) -> GitHubClient:
+        return GitHubClient(
+            self.authentication_token,
+            self.organization_name,
+            self.team_name,
+            partial_clone=self.partial_clone
+        )
+
+    def clone_repository(self, repository_url, revision: Optional[str] = None) -> Optional[str]:
         try:
-            authenticator = GitHubClient(
-                self.authentication_token,
-                self.organization_name,
-                self.team_name
-            )
-            repository_path = authenticator.clone_repo(repository_url, self.repo_path)
+            authenticator = self._github_client()
+            repository_path = authenticator.clone_repo(repository_url, self.repo_path, revision)
             if repository_path:
                 logger.info(f"Repository cloned to {repository_path}")
                 return repository_path
@@ -30,4 +37,10 @@ class GitConfig:
                 return None
         except Exception as e:
             logger.error(f"Error cloning repository: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def resolve_revision(self, repository_url, revision: Optional[str] = None) -> Optional[str]:
+        return self._github_client().resolve_revision(repository_url, self.repo_path, revision)
+
+    def release_repository(self, repository_path: str):
+        self._github_client().release_repo(repository_path, self.repo_path)
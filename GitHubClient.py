@@ -1,70 +1,170 @@
-import requests
-import git
 import os
+import json
+import time
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from GitMirrorCache import GitMirrorCache
+
+PER_PAGE = 100
 
 class GitHubClient:
-    def __init__(self, personal_access_token, organization, team):
+    def __init__(self, personal_access_token, organization, team,
+                 api_url='https://api.github.com', cache_directory=None, max_workers=8, partial_clone=None):
         self.personal_access_token = personal_access_token
         self.organization = organization
         self.team = team
+        self.api_url = api_url.rstrip('/')
+        self.cache_directory = cache_directory or os.getenv('GITHUB_CACHE_DIR', './.github-cache')
+        self.max_workers = max_workers
+        # Blobless mirrors fetch file contents only for the commits checked out
+        if partial_clone is None:
+            partial_clone = os.getenv('GIT_PARTIAL_CLONE', 'false').lower() == 'true'
+        self.partial_clone = partial_clone
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+        self.repo_urls = []
         logging.basicConfig(level=logging.INFO)
 
-    def get_repos(self):
-        # GitHub API URL to fetch repositories from the specified organization and team
-        url = f'https://api.github.com/orgs/{self.organization}/teams/{self.team}/repos'
-        params = {
-            'per_page': 100,
-            'page': 1
-        }
+        # One keep-alive pool shared by every page request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'token {self.personal_access_token}',
+            'Accept': 'application/vnd.github+json',
+        })
 
-        # Set up headers for authentication
-        headers = {
-            'Authorization': f'token {self.personal_access_token}'
-        }
+    def _cache_path(self, url, page):
+        key = hashlib.sha1(f'{url}?page={page}'.encode()).hexdigest()
+        return os.path.join(self.cache_directory, f'{key}.json')
 
-        self.repo_urls = []
+    def _load_cached_page(self, url, page):
+        try:
+            with open(self._cache_path(url, page)) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
 
-        # Loop to handle pagination
-        while True:
-            try:
-                # Make the request to GitHub API
-                response = requests.get(url, headers=headers, params=params)
-                response.raise_for_status()
+    def _store_cached_page(self, url, page, entry):
+        os.makedirs(self.cache_directory, exist_ok=True)
+        path = self._cache_path(url, page)
+        temporary_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'w') as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temporary_path, path)
 
-                # Parse the JSON response
-                repos = response.json()
+    def _track_rate_limit(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is not None:
+            self.rate_limit_remaining = int(remaining)
+        if reset is not None:
+            self.rate_limit_reset = int(reset)
 
-                if not repos:
-                    break  # No more repos
+    def _wait_for_rate_limit(self):
+        if self.rate_limit_remaining == 0 and self.rate_limit_reset:
+            delay = self.rate_limit_reset - time.time()
+            if delay > 0:
+                logging.warning(f'GitHub rate limit exhausted, waiting {delay:.0f}s for reset')
+                time.sleep(delay)
 
-                # Extract repository URLs
-                self.repo_urls.extend([repo['clone_url'] for repo in repos])
+    def _get_page(self, url, page):
+        # Conditional request: an unchanged page costs a 304, which GitHub
+        # does not count against the rate limit.
+        cached = self._load_cached_page(url, page)
+        headers = {'If-None-Match': cached['etag']} if cached and cached.get('etag') else {}
+        for attempt in range(2):
+            self._wait_for_rate_limit()
+            response = self.session.get(
+                url, headers=headers, params={'per_page': PER_PAGE, 'page': page}, timeout=30
+            )
+            self._track_rate_limit(response)
+            if response.status_code in (403, 429) and self.rate_limit_remaining == 0 and attempt == 0:
+                continue
+            break
 
-                params['page'] += 1  # Increment page number
-            except requests.exceptions.RequestException as e:
-                logging.error(f'Failed to retrieve repositories: {e}')
-                break
+        if response.status_code == 304 and cached:
+            # Page 1 stays unchanged while repos are added further on, so its
+            # cached Link header can be stale; prefer the one sent now
+            link = response.headers.get('Link', cached.get('link'))
+            if link != cached.get('link'):
+                self._store_cached_page(url, page, dict(cached, link=link))
+            return cached['clone_urls'], link
+        response.raise_for_status()
 
+        clone_urls = [repo['clone_url'] for repo in response.json()]
+        link = response.headers.get('Link')
+        if response.headers.get('ETag'):
+            self._store_cached_page(url, page, {
+                'etag': response.headers['ETag'],
+                'link': link,
+                'clone_urls': clone_urls,
+            })
+        return clone_urls, link
+
+    @staticmethod
+    def _last_page(link_header):
+        if not link_header:
+            return 1
+        for link in requests.utils.parse_header_links(link_header):
+            if link.get('rel') == 'last':
+                query = parse_qs(urlparse(link['url']).query)
+                return int(query.get('page', ['1'])[0])
+        return 1
+
+    def get_repos(self):
+        # GitHub API URL to fetch repositories from the specified organization and team
+        url = f'{self.api_url}/orgs/{self.organization}/teams/{self.team}/repos'
+
+        try:
+            # The first page's Link header tells us how many pages there are,
+            # the rest are fetched in parallel over the pooled session
+            first_page, link_header = self._get_page(url, 1)
+            last_page = self._last_page(link_header)
+            pages = [first_page]
+            if last_page > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    pages.extend(executor.map(lambda page: self._get_page(url, page)[0], range(2, last_page + 1)))
+            # A full last page means the page count was out of date; read on
+            # until a short page instead of returning a truncated list
+            while len(pages[-1]) == PER_PAGE:
+                pages.append(self._get_page(url, len(pages) + 1)[0])
+        except requests.exceptions.RequestException as e:
+            logging.error(f'Failed to retrieve repositories: {e}')
+            raise
+
+        self.repo_urls = [repo_url for page in pages for repo_url in page]
         return self.repo_urls
-    
-    def clone_repo(self, repo_url, base_directory):
+
+    def clone_repo(self, repo_url, base_directory, revision=None):
+        # Every build gets its own worktree of a shared bare mirror, pinned to
+        # the resolved commit, so concurrent builds never share a checkout.
+        try:
+            mirror_cache = GitMirrorCache(base_directory, self.partial_clone)
+            directory = mirror_cache.checkout(repo_url, self.personal_access_token, revision)
+            logging.info(f'Successfully checked out {repo_url} into {directory}')
+            return directory
+        except Exception as e:
+            logging.error(f'Failed to clone/pull repository: {e}')
+            return None
+
+    def resolve_revision(self, repo_url, base_directory, revision=None):
+        try:
+            mirror_cache = GitMirrorCache(base_directory, self.partial_clone)
+            return mirror_cache.resolve(repo_url, self.personal_access_token, revision)
+        except Exception as e:
+            logging.error(f'Failed to resolve {revision or "HEAD"} of {repo_url}: {e}')
+            return None
+
+    def release_repo(self, directory, base_directory):
         try:
-            # Extract repository name from URL
-            repo_name = repo_url.split('/')[-1].replace('.git', '')
-            directory = os.path.join(base_directory, repo_name)
-
-            if not os.path.exists(directory):
-                os.makedirs(directory)
-                auth_repo_url = repo_url.replace("https://", f"https://{self.personal_access_token}@")
-                git.Repo.clone_from(auth_repo_url, directory)
-                logging.info(f'Successfully cloned {repo_url} into {directory}')
-            else:
-                repo = git.Repo(directory)
-                auth_repo_url = repo_url.replace("https://", f"https://{self.personal_access_token}@")
-                origin = repo.remotes.origin
-                origin.set_url(auth_repo_url)
-                origin.pull()
-                logging.info(f'Successfully pulled latest changes for {repo_url} in {directory}')
+            GitMirrorCache(base_directory, self.partial_clone).release(directory)
         except Exception as e:
-            logging.error(f'Failed to clone/pull repository: {e}')
\ No newline at end of file
+            logging.error(f'Failed to release checkout {directory}: {e}')
@@ -0,0 +1,142 @@
+import os
+import re
+import uuid
+import fcntl
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import git
+
+logger = logging.getLogger(__name__)
+
+# Answers git's credential requests from the environment, so tokens are never
+# written to a mirror's config or put on a command line
+_CREDENTIAL_HELPER = (
+    '!f() { test "$1" = get && echo username=x-access-token && echo "password=$GIT_MIRROR_TOKEN"; }; f'
+)
+
+def credential_environment(token: Optional[str]) -> Dict[str, str]:
+    if not token:
+        return {}
+    return {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "credential.helper",
+        "GIT_CONFIG_VALUE_0": _CREDENTIAL_HELPER,
+        "GIT_MIRROR_TOKEN": token,
+        "GIT_TERMINAL_PROMPT": "0",
+    }
+
+_COMMIT_SHA = re.compile(r"[0-9a-f]{40}")
+
+class GitMirrorCache:
+    def __init__(self, base_directory: str, partial: bool = False):
+        self.base_directory = base_directory
+        self.mirrors_directory = os.path.join(base_directory, "mirrors")
+        self.worktrees_directory = os.path.join(base_directory, "worktrees")
+        # Partial mirrors skip blobs until a worktree needs them
+        self.partial = partial
+        os.makedirs(self.mirrors_directory, exist_ok=True)
+        os.makedirs(self.worktrees_directory, exist_ok=True)
+
+    @staticmethod
+    def repository_name(repo_url: str) -> str:
+        return repo_url.rstrip('/').split('/')[-1].replace('.git', '')
+
+    def mirror_path(self, repo_url: str) -> str:
+        url_digest = hashlib.sha1(repo_url.encode()).hexdigest()[:12]
+        return os.path.join(self.mirrors_directory, f"{self.repository_name(repo_url)}-{url_digest}.git")
+
+    @contextmanager
+    def _locked(self, mirror_path: str):
+        with open(f"{mirror_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _fetch(self, mirror: git.Repo):
+        # Caller provides credentials through the environment
+        fetch_arguments = ["--prune", "--force"]
+        if self.partial:
+            fetch_arguments.append("--filter=blob:none")
+        mirror.git.fetch(
+            *fetch_arguments,
+            "origin",
+            "+refs/heads/*:refs/heads/*",
+            "+refs/tags/*:refs/tags/*",
+        )
+        symbolic_head = mirror.git.ls_remote("--symref", "origin", "HEAD").splitlines()
+        for line in symbolic_head:
+            if line.startswith("ref: "):
+                mirror.git.symbolic_ref("HEAD", line[len("ref: "):].split("\t")[0])
+                break
+
+    def update_mirror(self, repo_url: str, token: Optional[str] = None) -> str:
+        mirror_path = self.mirror_path(repo_url)
+        with self._locked(mirror_path):
+            if os.path.exists(mirror_path):
+                mirror = git.Repo(mirror_path)
+            else:
+                mirror = git.Repo.init(mirror_path, bare=True)
+                if self.partial:
+                    # Missing blobs are fetched lazily through origin
+                    mirror.git.config("extensions.partialClone", "origin")
+                    mirror.git.config("remote.origin.promisor", "true")
+                    mirror.git.config("remote.origin.partialclonefilter", "blob:none")
+            # Always the plain URL, replacing any credentials stored by older mirrors
+            mirror.git.config("remote.origin.url", repo_url)
+            with mirror.git.custom_environment(**credential_environment(token)):
+                self._fetch(mirror)
+        logger.info(f"Mirror for {repo_url} updated at {mirror_path}")
+        return mirror_path
+
+    def _has_commit(self, mirror_path: str, revision: Optional[str]) -> bool:
+        # A pinned commit never changes, so once the mirror has it there is
+        # nothing to fetch; branches and tags always are
+        if not revision or not _COMMIT_SHA.fullmatch(revision) or not os.path.exists(mirror_path):
+            return False
+        with self._locked(mirror_path):
+            try:
+                git.Repo(mirror_path).git.cat_file("-e", f"{revision}^{{commit}}")
+                return True
+            except git.GitCommandError:
+                return False
+
+    def _mirror_with(self, repo_url: str, token: Optional[str], revision: Optional[str]) -> str:
+        mirror_path = self.mirror_path(repo_url)
+        if self._has_commit(mirror_path, revision):
+            return mirror_path
+        return self.update_mirror(repo_url, token)
+
+    def resolve(self, repo_url: str, token: Optional[str] = None, revision: Optional[str] = None) -> str:
+        mirror_path = self._mirror_with(repo_url, token, revision)
+        with self._locked(mirror_path):
+            return git.Repo(mirror_path).commit(revision or "HEAD").hexsha
+
+    def checkout(self, repo_url: str, token: Optional[str] = None, revision: Optional[str] = None) -> str:
+        mirror_path = self._mirror_with(repo_url, token, revision)
+        with self._locked(mirror_path):
+            mirror = git.Repo(mirror_path)
+            commit_sha = mirror.commit(revision or "HEAD").hexsha
+            worktree_path = os.path.join(
+                self.worktrees_directory,
+                f"{self.repository_name(repo_url)}-{commit_sha[:12]}-{uuid.uuid4().hex[:8]}"
+            )
+            # Checking out a partial mirror fetches the commit's blobs
+            with mirror.git.custom_environment(**credential_environment(token)):
+                mirror.git.worktree("add", "--detach", worktree_path, commit_sha)
+        logger.info(f"Checked out {repo_url}@{commit_sha[:12]} into {worktree_path}")
+        return worktree_path
+
+    def release(self, worktree_path: str):
+        if not os.path.exists(worktree_path):
+            return
+        mirror_path = git.Repo(worktree_path).common_dir
+        with self._locked(os.path.normpath(mirror_path)):
+            mirror = git.Repo(mirror_path)
+            mirror.git.worktree("remove", "--force", worktree_path)
+            mirror.git.worktree("prune")
+        logger.info(f"Released worktree {worktree_path}")
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+import git
+from docker.errors import APIError, ImageNotFound, NotFound
+
+logger = logging.getLogger(__name__)
+
+class ImageCache:
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        repository: str = "bot",
+        registry: Optional[str] = None,
+    ):
+        self.index_path = index_path or os.getenv("IMAGE_CACHE_INDEX", "./image-cache.json")
+        if max_entries is None:
+            max_entries = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "50"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.repository = repository
+        registry = registry or os.getenv("IMAGE_REGISTRY")
+        self.registry = registry.rstrip("/") if registry else None
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError) as exception:
+            logger.warning(f"Ignoring unreadable image cache index '{self.index_path}': {exception}")
+            return {}
+
+    def _save_index(self):
+        temporary_path = f"{self.index_path}.tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump(self.entries, index_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.index_path)
+
+    def cache_tag(self, repository_path: str, build_parameters: Dict) -> Optional[str]:
+        # The tag is derived from everything that feeds the build: the checked
+        # out commit, the Dockerfile and the build args. Uncommitted changes
+        # are not covered, so dirty trees are never cached.
+        try:
+            repository = git.Repo(repository_path)
+            if repository.is_dirty(untracked_files=True):
+                logger.info(f"Repository at '{repository_path}' has local changes, skipping image cache.")
+                return None
+            commit_sha = repository.head.commit.hexsha
+        except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError, ValueError) as exception:
+            logger.warning(f"Cannot resolve commit for '{repository_path}', skipping image cache: {exception}")
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(commit_sha.encode())
+        dockerfile_path = os.path.join(repository_path, "Dockerfile")
+        if os.path.exists(dockerfile_path):
+            with open(dockerfile_path, "rb") as dockerfile:
+                digest.update(hashlib.sha256(dockerfile.read()).digest())
+        digest.update(json.dumps(build_parameters or {}, sort_keys=True).encode())
+        return f"{self.repository}:{digest.hexdigest()[:24]}"
+
+    def image_reference(self, tag: str) -> str:
+        if self.registry:
+            return f"{self.registry}/{tag}"
+        return tag
+
+    def lookup(self, docker_client, tag: str) -> Optional[str]:
+        reference = self.image_reference(tag)
+        try:
+            docker_client.images.get(reference)
+            logger.info(f"Image cache hit for '{reference}' (local).")
+        except ImageNotFound:
+            if not self.registry:
+                self._forget(tag)
+                return None
+            try:
+                docker_client.images.pull(reference)
+                logger.info(f"Image cache hit for '{reference}' (registry).")
+            except (NotFound, APIError):
+                self._forget(tag)
+                return None
+        self._touch(tag)
+        return reference
+
+    def store(self, docker_client, tag: str, image) -> str:
+        reference = self.image_reference(tag)
+        if reference != tag:
+            image.tag(reference)
+            for line in docker_client.images.push(reference, stream=True, decode=True):
+                if "error" in line:
+                    raise APIError(line["error"])
+            logger.info(f"Image '{reference}' pushed to registry.")
+
+        with self._lock:
+            self.entries[tag] = {
+                "reference": reference,
+                "size": image.attrs.get("Size", 0),
+                "created": time.time(),
+                "last_used": time.time(),
+            }
+            self._save_index()
+        self.evict(docker_client, keep=tag)
+        return reference
+
+    def _touch(self, tag: str):
+        with self._lock:
+            entry = self.entries.setdefault(tag, {
+                "reference": self.image_reference(tag),
+                "size": 0,
+                "created": time.time(),
+            })
+            entry["last_used"] = time.time()
+            self._save_index()
+
+    def _forget(self, tag: str):
+        with self._lock:
+            if self.entries.pop(tag, None) is not None:
+                self._save_index()
+
+    def evict(self, docker_client, keep: Optional[str] = None):
+        with self._lock:
+            by_age = sorted(self.entries.items(), key=lambda item: item[1]["last_used"])
+            total_bytes = sum(entry["size"] for _, entry in by_age)
+            victims = []
+            for tag, entry in by_age:
+                if len(self.entries) - len(victims) <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                if tag == keep:
+                    continue
+                victims.append((tag, entry))
+                total_bytes -= entry["size"]
+            for tag, _ in victims:
+                del self.entries[tag]
+            if victims:
+                self._save_index()
+
+        for tag, entry in victims:
+            try:
+                docker_client.images.remove(entry["reference"])
+                logger.info(f"Evicted image '{entry['reference']}' from cache.")
+            except ImageNotFound:
+                pass
+            except APIError as api_error:
+                logger.warning(f"Failed to remove cached image '{entry['reference']}': {api_error}")
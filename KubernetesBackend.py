@@ -0,0 +1,185 @@
+import os
+import time
+import random
+import logging
+import functools
+import threading
+from typing import Callable, Dict, Optional
+
+from kubernetes import client, config, watch
+from kubernetes.client.exceptions import ApiException
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, qps: float, burst: int):
+        self.qps = qps
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.qps)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.qps
+            time.sleep(wait)
+
+class ThrottledApi:
+    def __init__(
+        self,
+        api,
+        token_bucket: Optional[TokenBucket] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0
+    ):
+        # Wraps one generated *Api object: every call takes a token from the
+        # shared bucket and is retried on 429/5xx with jittered backoff.
+        self._api = api
+        self._token_bucket = token_bucket
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        # Optional callback(method_name, seconds, succeeded) for metrics
+        self.observer: Optional[Callable[[str, float, bool], None]] = None
+
+    def _delay(self, attempt: int, api_exception: ApiException) -> float:
+        retry_after = (api_exception.headers or {}).get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter keeps many throttled workers from retrying in lockstep
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+    def __getattr__(self, name: str):
+        method = getattr(self._api, name)
+        if not callable(method) or name.startswith("_"):
+            return method
+
+        # functools.wraps keeps the docstring and signature that
+        # kubernetes.watch inspects to find the watched return type.
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            attempt = 0
+            while True:
+                if self._token_bucket:
+                    self._token_bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    result = method(*args, **kwargs)
+                    if self.observer:
+                        self.observer(name, time.perf_counter() - started, True)
+                    return result
+                except ApiException as api_exception:
+                    if self.observer:
+                        self.observer(name, time.perf_counter() - started, False)
+                    if api_exception.status not in RETRYABLE_STATUSES or attempt >= self._max_retries:
+                        raise
+                    delay = self._delay(attempt, api_exception)
+                    logger.warning(
+                        f"Kubernetes call '{name}' failed with {api_exception.status}, "
+                        f"retrying in {delay:.2f}s ({attempt + 1}/{self._max_retries})."
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+
+        return call
+
+def load_configuration() -> str:
+    # Inside a pod the service account token is mounted and the API server is
+    # advertised through the environment; anywhere else use the kubeconfig.
+    if os.getenv("KUBERNETES_SERVICE_HOST"):
+        try:
+            config.load_incluster_config()
+            return "in-cluster"
+        except config.ConfigException as config_exception:
+            logger.warning(f"In-cluster configuration unavailable, using kubeconfig: {config_exception}")
+    config.load_kube_config()
+    return "kubeconfig"
+
+class KubernetesBackend:
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        qps: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: int = 5
+    ):
+        self.pool_size = pool_size or int(os.getenv("KUBE_API_POOL_SIZE", "32"))
+        qps = qps or float(os.getenv("KUBE_API_QPS", "50"))
+        burst = burst or int(os.getenv("KUBE_API_BURST", "100"))
+        self.max_retries = max_retries
+        self.token_bucket = TokenBucket(qps, burst)
+        # Configuration is loaded and API objects are created on first use, so
+        # building a backend costs nothing until the cluster is actually called
+        self._api_client = None
+        self._apis: Dict[str, ThrottledApi] = {}
+        self._observer: Optional[Callable[[str, float, bool], None]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def api_client(self):
+        with self._lock:
+            if self._api_client is None:
+                try:
+                    source = load_configuration()
+                except Exception as exception:
+                    # Retried on the next access
+                    logger.error(f"Failed to load Kubernetes configuration: {exception}")
+                    raise
+                configuration = client.Configuration.get_default_copy()
+                configuration.connection_pool_maxsize = self.pool_size
+                # One ApiClient, and so one urllib3 pool, shared by every API group
+                self._api_client = client.ApiClient(configuration)
+                logger.info(f"Kubernetes client configured from {source} configuration.")
+            return self._api_client
+
+    def _api(self, name: str) -> ThrottledApi:
+        api = self._apis.get(name)
+        if api is None:
+            api = ThrottledApi(getattr(client, name)(self.api_client), self.token_bucket, self.max_retries)
+            api.observer = self._observer
+            with self._lock:
+                api = self._apis.setdefault(name, api)
+        return api
+
+    @property
+    def core_api(self) -> ThrottledApi:
+        return self._api("CoreV1Api")
+
+    @property
+    def rbac_api(self) -> ThrottledApi:
+        return self._api("RbacAuthorizationV1Api")
+
+    @property
+    def apps_api(self) -> ThrottledApi:
+        return self._api("AppsV1Api")
+
+    @property
+    def auth_api(self) -> ThrottledApi:
+        return self._api("AuthenticationV1Api")
+
+    @property
+    def custom_objects_api(self) -> ThrottledApi:
+        # metrics.k8s.io is only reachable through the generic custom objects API
+        return self._api("CustomObjectsApi")
+
+    def watch(self):
+        return watch.Watch()
+
+    def set_call_observer(self, observer: Callable[[str, float, bool], None]):
+        # Also applied to API objects created later
+        self._observer = observer
+        for api in list(self._apis.values()):
+            api.observer = observer
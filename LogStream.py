@@ -0,0 +1,232 @@
+import os
+import re
+import math
+import time
+import heapq
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def parse_log_timestamp(timestamp: str) -> int:
+    # Kubelet timestamps are RFC3339Nano with trailing zeros trimmed, so they
+    # are converted to integer nanoseconds instead of compared as strings.
+    seconds_part, _, fraction = timestamp.rstrip('Z').partition('.')
+    parsed = datetime.fromisoformat(seconds_part).replace(tzinfo=timezone.utc)
+    nanoseconds = int(fraction.ljust(9, '0')[:9]) if fraction else 0
+    return int(parsed.timestamp()) * 1_000_000_000 + nanoseconds
+
+def split_timestamped_line(line: str) -> Tuple[Optional[int], str]:
+    timestamp, separator, text = line.partition(' ')
+    if not separator:
+        return None, line
+    try:
+        return parse_log_timestamp(timestamp), text
+    except ValueError:
+        return None, line
+
+def iter_response_lines(response, chunk_size: int = 16 * 1024) -> Iterator[str]:
+    pending = b''
+    finished = False
+    try:
+        for chunk in response.stream(chunk_size, decode_content=True):
+            pending += chunk
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                yield line.decode('utf-8', errors='replace')
+        finished = True
+        if pending:
+            yield pending.decode('utf-8', errors='replace')
+    finally:
+        # A body left unread, as when a follow is abandoned, would still be
+        # arriving on the socket; closing keeps it out of the shared pool
+        if not finished:
+            response.close()
+        response.release_conn()
+
+class LogRingBuffer:
+    def __init__(self, max_lines: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_lines = max_lines or int(os.getenv("LOG_BUFFER_MAX_LINES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("LOG_BUFFER_MAX_BYTES", str(1024 * 1024)))
+        self._lines = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def append(self, line: str):
+        with self._lock:
+            self._lines.append(line)
+            self._bytes += len(line) + 1
+            while self._lines and (len(self._lines) > self.max_lines or self._bytes > self.max_bytes):
+                self._bytes -= len(self._lines.popleft()) + 1
+
+    def extend(self, lines: List[str]):
+        for line in lines:
+            self.append(line)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            return list(self._lines)
+
+    def text(self) -> str:
+        return '\n'.join(self.lines())
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+class LogCursor:
+    def __init__(self):
+        # Position of the newest line seen, plus how many lines shared that
+        # exact timestamp, so overlapping fetches can be de-duplicated.
+        self.last_timestamp: Optional[int] = None
+        self.lines_at_last_timestamp = 0
+
+    def since_seconds(self, margin: int = 5) -> Optional[int]:
+        if self.last_timestamp is None:
+            return None
+        elapsed = time.time() - self.last_timestamp / 1_000_000_000
+        return max(1, math.ceil(elapsed) + margin)
+
+    def start_filter(self):
+        # Returns a predicate that drops lines already seen by this cursor
+        # for the duration of a single fetch.
+        last_timestamp = self.last_timestamp
+        remaining_duplicates = self.lines_at_last_timestamp
+
+        def is_new(timestamp: Optional[int]) -> bool:
+            nonlocal remaining_duplicates
+            if last_timestamp is None or timestamp is None or timestamp > last_timestamp:
+                return True
+            if timestamp == last_timestamp and remaining_duplicates > 0:
+                remaining_duplicates -= 1
+                return False
+            return timestamp == last_timestamp
+
+        return is_new
+
+    def advance(self, timestamp: Optional[int]):
+        if timestamp is None:
+            return
+        if timestamp == self.last_timestamp:
+            self.lines_at_last_timestamp += 1
+        elif self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.lines_at_last_timestamp = 1
+
+class LogFanIn:
+    def __init__(
+        self,
+        sources: Dict[str, Callable[[], object]],
+        pattern: Optional[str] = None,
+        since_timestamp: Optional[int] = None,
+        reorder_window: float = 1.0,
+        max_buffered_lines: int = 10000
+    ):
+        # Each source opens the timestamped log response of one bot. Lines
+        # are filtered on the reader threads and pushed through a bounded
+        # queue; a full queue blocks the readers, and with them the HTTP
+        # streams. Stopping closes the responses, so readers blocked on quiet
+        # pods let go of their threads and connections.
+        self.sources = sources
+        self.pattern = re.compile(pattern) if pattern else None
+        self.since_timestamp = since_timestamp
+        self.reorder_window_ns = int(reorder_window * 1_000_000_000)
+        self.max_buffered_lines = max_buffered_lines
+        self._queue = queue.Queue(maxsize=max_buffered_lines)
+        self._stopped = threading.Event()
+        self._responses: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, bot_id: str, open_response: Callable[[], object]):
+        try:
+            response = open_response()
+            with self._lock:
+                stopped = self._stopped.is_set()
+                if not stopped:
+                    self._responses[bot_id] = response
+            if stopped:
+                response.close()
+                return
+            for line in iter_response_lines(response):
+                if self._stopped.is_set():
+                    break
+                timestamp, text = split_timestamped_line(line)
+                if timestamp is None:
+                    timestamp = time.time_ns()
+                if self.since_timestamp is not None and timestamp < self.since_timestamp:
+                    continue
+                if self.pattern and not self.pattern.search(text):
+                    continue
+                self._put((timestamp, bot_id, text))
+        except Exception as exception:
+            if not self._stopped.is_set():
+                logger.warning(f"Log stream for bot '{bot_id}' ended with error: {exception}")
+        finally:
+            with self._lock:
+                self._responses.pop(bot_id, None)
+            self._put((None, bot_id, None))
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def stop(self):
+        with self._lock:
+            self._stopped.set()
+            responses = list(self._responses.values())
+        for response in responses:
+            try:
+                response.close()
+            except Exception as exception:
+                logger.warning(f"Failed to close log response: {exception}")
+
+    def __iter__(self) -> Iterator[Tuple[int, str, str]]:
+        for bot_id, open_response in self.sources.items():
+            threading.Thread(
+                target=self._read,
+                args=(bot_id, open_response),
+                name=f"log-tail-{bot_id}",
+                daemon=True
+            ).start()
+
+        # A line is released once every live stream has reached its
+        # timestamp. Streams that stay quiet for longer than the reorder
+        # window stop holding the others back.
+        started = time.monotonic()
+        latest: Dict[str, Tuple[int, float]] = {bot_id: (-1, started) for bot_id in self.sources}
+        pending: List[Tuple[int, int, str, str]] = []
+        sequence = 0
+        try:
+            while latest or pending:
+                try:
+                    timestamp, bot_id, text = self._queue.get(timeout=0.1)
+                    if timestamp is None:
+                        latest.pop(bot_id, None)
+                    else:
+                        latest[bot_id] = (timestamp, time.monotonic())
+                        heapq.heappush(pending, (timestamp, sequence, bot_id, text))
+                        sequence += 1
+                except queue.Empty:
+                    pass
+
+                quiet_before = time.monotonic() - self.reorder_window_ns / 1_000_000_000
+                frontier = min(
+                    (timestamp for timestamp, received in latest.values() if received > quiet_before),
+                    default=None
+                )
+                while pending and (
+                    frontier is None
+                    or pending[0][0] <= frontier
+                    or len(pending) > self.max_buffered_lines
+                ):
+                    timestamp, _, bot_id, text = heapq.heappop(pending)
+                    yield timestamp, bot_id, text
+        finally:
+            self.stop()
@@ -0,0 +1,148 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+SERVICE_ACCOUNT_NAME = "bot-service-account"
+ROLE_NAME = "bot-role"
+ROLE_BINDING_NAME = "bot-rolebinding"
+REGISTRY_SECRET_NAME = "registry-credentials"
+
+# Manifests here are plain dicts in the API's JSON form, which the client
+# sends without walking generated models. They must never hold None: model
+# serialization drops unset fields, and spec hashes have to match either way.
+
+_CONTAINER_SECURITY_CONTEXT = {
+    "runAsNonRoot": True,
+    "allowPrivilegeEscalation": False,
+    "readOnlyRootFilesystem": True,
+    "capabilities": {"drop": ["ALL"]},
+}
+
+_POD_SPEC = {
+    "serviceAccountName": SERVICE_ACCOUNT_NAME,
+    "automountServiceAccountToken": False,
+    "securityContext": {
+        "runAsNonRoot": True,
+        "runAsUser": 1000,
+        "runAsGroup": 3000,
+        "fsGroup": 2000,
+    },
+    "restartPolicy": "Never",
+    "imagePullSecrets": [{"name": REGISTRY_SECRET_NAME}],
+}
+
+_ROLE_RULES = [{"apiGroups": [""], "resources": [], "verbs": []}]
+
+def namespace_manifest(name: str, labels: Optional[Dict[str, str]] = None) -> Dict:
+    return {
+        "apiVersion": "v1",
+        "kind": "Namespace",
+        "metadata": {"name": name, "labels": {"name": name, **(labels or {})}},
+    }
+
+def service_account_manifest(namespace: Optional[str] = None) -> Dict:
+    metadata = {"name": SERVICE_ACCOUNT_NAME}
+    if namespace:
+        metadata["namespace"] = namespace
+    return {"apiVersion": "v1", "kind": "ServiceAccount", "metadata": metadata}
+
+def role_manifest(namespace: str) -> Dict:
+    return {
+        "apiVersion": "rbac.authorization.k8s.io/v1",
+        "kind": "Role",
+        "metadata": {"namespace": namespace, "name": ROLE_NAME},
+        "rules": _ROLE_RULES,
+    }
+
+def role_binding_manifest(namespace: str) -> Dict:
+    return {
+        "apiVersion": "rbac.authorization.k8s.io/v1",
+        "kind": "RoleBinding",
+        "metadata": {"namespace": namespace, "name": ROLE_BINDING_NAME},
+        "subjects": [{"kind": "ServiceAccount", "name": SERVICE_ACCOUNT_NAME, "namespace": namespace}],
+        "roleRef": {"kind": "Role", "name": ROLE_NAME, "apiGroup": "rbac.authorization.k8s.io"},
+    }
+
+def secret_manifest(
+    name: str,
+    broker_config: Dict,
+    namespace: Optional[str] = None,
+    resource_version: Optional[str] = None
+) -> Dict:
+    metadata = {"name": name}
+    if namespace:
+        metadata["namespace"] = namespace
+    if resource_version:
+        metadata["resourceVersion"] = resource_version
+    return {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "metadata": metadata,
+        # Remove any None values
+        "stringData": {k: str(v) for k, v in broker_config.items() if v is not None},
+        "type": "Opaque",
+    }
+
+class _ManifestDumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):
+    # Filled manifests share nested values with their templates; write them
+    # out in full instead of as YAML anchors and aliases
+    def ignore_aliases(self, data) -> bool:
+        return True
+
+def to_yaml(manifests: Iterable[Dict]) -> str:
+    # Multi-document YAML, ready for kubectl apply -f
+    return yaml.dump_all(list(manifests), Dumper=_ManifestDumper, sort_keys=False, default_flow_style=False)
+
+class ManifestTemplates:
+    def __init__(self):
+        # (broker, secret name, config keys) -> container fields shared by every
+        # bot of that broker profile; filled copies share the nested values
+        self._containers: Dict[Tuple[str, str, Tuple[str, ...]], Dict] = {}
+        self._lock = threading.Lock()
+
+    def _container_template(self, bot_config, secret_name: str) -> Dict:
+        broker_config = bot_config.broker_config
+        key = (bot_config.broker, secret_name, tuple(broker_config))
+        template = self._containers.get(key)
+        if template is None:
+            template = {
+                "imagePullPolicy": "Always",
+                "env": [
+                    {"name": k, "valueFrom": {"secretKeyRef": {"name": secret_name, "key": k}}}
+                    for k in broker_config
+                ],
+                "securityContext": _CONTAINER_SECURITY_CONTEXT,
+            }
+            with self._lock:
+                template = self._containers.setdefault(key, template)
+        return template
+
+    def container(self, bot_config, name: str, resources: Dict, secret_name: str) -> Dict:
+        container = dict(self._container_template(bot_config, secret_name))
+        container["name"] = name
+        if bot_config.image is not None:
+            container["image"] = bot_config.image
+        container["resources"] = resources
+        return container
+
+    @staticmethod
+    def pod_spec(containers: List[Dict]) -> Dict:
+        spec = dict(_POD_SPEC)
+        spec["containers"] = containers
+        return spec
+
+    @staticmethod
+    def pod(
+        name: str,
+        namespace: str,
+        labels: Dict[str, str],
+        annotations: Dict[str, str],
+        spec: Dict
+    ) -> Dict:
+        return {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {"name": name, "namespace": namespace, "labels": labels, "annotations": annotations},
+            "spec": spec,
+        }
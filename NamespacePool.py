@@ -0,0 +1,119 @@
+import uuid
+import logging
+import threading
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from kubernetes.client.exceptions import ApiException
+
+from ManifestTemplates import namespace_manifest
+
+logger = logging.getLogger(__name__)
+
+POOL_LABEL = "bot-manager/pool"
+POOL_PREFIX = "bot-pool-"
+
+class NamespacePool:
+    def __init__(
+        self,
+        kubernetes_core_api,
+        setup_rbac: Callable[[str], None],
+        size: int,
+        refill_interval: float = 30.0
+    ):
+        self.kubernetes_core_api = kubernetes_core_api
+        self.setup_rbac = setup_rbac
+        self.size = size
+        self.refill_interval = refill_interval
+        # (namespace name, resourceVersion) of namespaces ready to be claimed
+        self._available: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def is_pooled(namespace: str) -> bool:
+        return namespace.startswith(POOL_PREFIX)
+
+    def available(self) -> int:
+        return len(self._available)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._adopt_existing()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="namespace-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._refill_requested.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _adopt_existing(self):
+        namespaces = self.kubernetes_core_api.list_namespace(label_selector=f"{POOL_LABEL}=available")
+        with self._lock:
+            known = {name for name, _ in self._available}
+            for namespace in namespaces.items:
+                if namespace.metadata.name not in known and namespace.status.phase != "Terminating":
+                    self._available.append((namespace.metadata.name, namespace.metadata.resource_version))
+        logger.info(f"Namespace pool adopted {len(self._available)} pre-provisioned namespaces.")
+
+    def _provision_one(self) -> Tuple[str, str]:
+        namespace_name = f"{POOL_PREFIX}{uuid.uuid4().hex[:12]}"
+        self.kubernetes_core_api.create_namespace(
+            namespace_manifest(namespace_name, {POOL_LABEL: "provisioning"})
+        )
+        self.setup_rbac(namespace_name)
+        # Only advertise the namespace once its RBAC objects exist
+        namespace = self.kubernetes_core_api.patch_namespace(
+            namespace_name, {"metadata": {"labels": {POOL_LABEL: "available"}}}
+        )
+        return namespace_name, namespace.metadata.resource_version
+
+    def refill(self):
+        while not self._stopped.is_set() and len(self._available) < self.size:
+            try:
+                entry = self._provision_one()
+            except ApiException as api_exception:
+                logger.error(f"Failed to pre-provision pooled namespace: {api_exception}")
+                return
+            with self._lock:
+                self._available.append(entry)
+            logger.info(f"Namespace '{entry[0]}' added to pool ({len(self._available)}/{self.size}).")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refill()
+            self._refill_requested.wait(self.refill_interval)
+            self._refill_requested.clear()
+
+    def claim(self, user_id: str, bot_id: str) -> Optional[str]:
+        while True:
+            with self._lock:
+                if not self._available:
+                    self._refill_requested.set()
+                    return None
+                namespace_name, resource_version = self._available.popleft()
+            # The resourceVersion precondition makes the claim fail with 409 if
+            # another manager relabelled the namespace first.
+            claim_patch = {
+                "metadata": {
+                    "resourceVersion": resource_version,
+                    "labels": {POOL_LABEL: "claimed", "user_id": user_id, "bot_id": bot_id},
+                }
+            }
+            try:
+                self.kubernetes_core_api.patch_namespace(namespace_name, claim_patch)
+            except ApiException as api_exception:
+                if api_exception.status in (404, 409):
+                    logger.warning(f"Pooled namespace '{namespace_name}' was taken or removed, trying next.")
+                    continue
+                raise
+            self._refill_requested.set()
+            logger.info(f"Claimed pooled namespace '{namespace_name}' for bot '{bot_id}'.")
+            return namespace_name
@@ -0,0 +1,222 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from BotPacker import format_cpu, format_memory, parse_cpu, parse_memory
+
+logger = logging.getLogger(__name__)
+
+RIGHT_SIZING_MODES = ("off", "recommend", "apply")
+
+# Bounds every recommendation is clamped to, per broker
+DEFAULT_GUARDRAILS = {
+    "min_cpu": "50m",
+    "max_cpu": "1",
+    "min_memory": "128Mi",
+    "max_memory": "2Gi",
+}
+BROKER_GUARDRAILS = {
+    "interactive_brokers": {
+        "min_cpu": "250m",
+        "max_cpu": "2",
+        "min_memory": "768Mi",
+        "max_memory": "4Gi",
+    },
+}
+
+class DecayingHistogram:
+    # Exponentially sized buckets with exponentially decaying sample weights,
+    # as in the VPA recommender: memory is bounded by the number of buckets
+    # however many samples are recorded, and old usage gradually stops counting.
+    def __init__(self, first_bucket: float, ratio: float = 1.05, half_life: float = 24 * 3600.0):
+        self.first_bucket = first_bucket
+        self.ratio = ratio
+        self.half_life = half_life
+        self.weights: Dict[int, float] = {}
+        self.total_weight = 0.0
+        self.samples = 0
+        self._reference: Optional[float] = None
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.first_bucket:
+            return 0
+        return int(math.log(value / self.first_bucket, self.ratio)) + 1
+
+    def _bucket_end(self, index: int) -> float:
+        return self.first_bucket * self.ratio ** index
+
+    def add(self, value: float, timestamp: float):
+        if self._reference is None:
+            self._reference = timestamp
+        # Newer samples weigh more instead of older ones being decayed
+        weight = 2 ** ((timestamp - self._reference) / self.half_life)
+        if weight > 1e9:
+            self.weights = {index: bucket / weight for index, bucket in self.weights.items()}
+            self.total_weight /= weight
+            self._reference = timestamp
+            weight = 1.0
+        index = self._bucket(value)
+        self.weights[index] = self.weights.get(index, 0.0) + weight
+        self.total_weight += weight
+        self.samples += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.weights:
+            return None
+        threshold = fraction * self.total_weight
+        cumulative = 0.0
+        for index in sorted(self.weights):
+            cumulative += self.weights[index]
+            if cumulative >= threshold:
+                return self._bucket_end(index)
+        return self._bucket_end(max(self.weights))
+
+class MetricsServerSource:
+    # Reads current per-container usage from metrics.k8s.io
+    def __init__(self, backend, label_selector: str = "app=bot"):
+        self.backend = backend
+        self.label_selector = label_selector
+
+    @property
+    def custom_objects_api(self):
+        return self.backend.custom_objects_api
+
+    def samples(self) -> List[Tuple[str, float, int]]:
+        pod_metrics = self.custom_objects_api.list_cluster_custom_object(
+            "metrics.k8s.io", "v1beta1", "pods", label_selector=self.label_selector
+        )
+        samples = []
+        for item in pod_metrics.get("items", []):
+            labels = item["metadata"].get("labels") or {}
+            for container in item.get("containers", []):
+                # Unpacked pods run one "bot" container; packed pods name each "bot-<bot_id>"
+                if container["name"] == "bot":
+                    bot_id = labels.get("bot_id")
+                elif container["name"].startswith("bot-"):
+                    bot_id = container["name"][len("bot-"):]
+                else:
+                    continue
+                if bot_id:
+                    usage = container["usage"]
+                    samples.append((bot_id, parse_cpu(usage["cpu"]), parse_memory(usage["memory"])))
+        return samples
+
+class RightSizer:
+    def __init__(
+        self,
+        metrics_source,
+        mode: Optional[str] = None,
+        min_samples: Optional[int] = None,
+        margin: Optional[float] = None,
+        min_change: Optional[float] = None
+    ):
+        self.metrics_source = metrics_source
+        self.mode = mode or os.getenv("RIGHT_SIZING_MODE", "recommend")
+        if self.mode not in RIGHT_SIZING_MODES:
+            raise ValueError(f"Unsupported right-sizing mode: {self.mode}")
+        self.min_samples = min_samples or int(os.getenv("RIGHT_SIZING_MIN_SAMPLES", "60"))
+        self.margin = margin if margin is not None else float(os.getenv("RIGHT_SIZING_MARGIN", "0.15"))
+        # Recommendations closer than this to the current values are not
+        # applied, since every change restarts the bot's pod
+        self.min_change = min_change if min_change is not None else float(os.getenv("RIGHT_SIZING_MIN_CHANGE", "0.2"))
+        # bot_id -> (cpu histogram in cores, memory histogram in bytes)
+        self._usage: Dict[str, Tuple[DecayingHistogram, DecayingHistogram]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, bot_id: str, cpu: float, memory: int, timestamp: Optional[float] = None):
+        timestamp = timestamp or time.time()
+        with self._lock:
+            usage = self._usage.get(bot_id)
+            if usage is None:
+                usage = self._usage[bot_id] = (DecayingHistogram(0.001), DecayingHistogram(1024 ** 2))
+            usage[0].add(cpu, timestamp)
+            usage[1].add(memory, timestamp)
+
+    def forget(self, bot_id: str):
+        with self._lock:
+            self._usage.pop(bot_id, None)
+
+    def sample(self) -> int:
+        samples = self.metrics_source.samples()
+        timestamp = time.time()
+        for bot_id, cpu, memory in samples:
+            self.record(bot_id, cpu, memory, timestamp)
+        return len(samples)
+
+    def recommend(self, bot_id: str, broker: str) -> Optional[Dict]:
+        with self._lock:
+            usage = self._usage.get(bot_id)
+            if usage is None or usage[0].samples < self.min_samples:
+                return None
+            cpu_p90, cpu_p99 = usage[0].percentile(0.90), usage[0].percentile(0.99)
+            memory_p95, memory_p99 = usage[1].percentile(0.95), usage[1].percentile(0.99)
+
+        guardrails = BROKER_GUARDRAILS.get(broker, DEFAULT_GUARDRAILS)
+        min_cpu, max_cpu = parse_cpu(guardrails["min_cpu"]), parse_cpu(guardrails["max_cpu"])
+        min_memory, max_memory = parse_memory(guardrails["min_memory"]), parse_memory(guardrails["max_memory"])
+
+        def clamp(value, low, high):
+            return min(max(value, low), high)
+
+        # Requests track typical usage; limits leave headroom for bursts, and
+        # memory more so since exceeding it kills the bot instead of throttling it
+        cpu_request = clamp(cpu_p90 * (1 + self.margin), min_cpu, max_cpu)
+        cpu_limit = clamp(max(cpu_request * 2, cpu_p99 * (1 + self.margin)), cpu_request, max_cpu)
+        memory_request = clamp(memory_p95 * (1 + self.margin), min_memory, max_memory)
+        memory_limit = clamp(max(memory_request * 1.5, memory_p99 * (1 + self.margin)), memory_request, max_memory)
+        return {
+            "requests": {"cpu": format_cpu(cpu_request), "memory": format_memory(memory_request)},
+            "limits": {"cpu": format_cpu(cpu_limit), "memory": format_memory(memory_limit)},
+        }
+
+    def _differs(self, current: Dict, recommended: Dict) -> bool:
+        for section in ("requests", "limits"):
+            for resource, parse in (("cpu", parse_cpu), ("memory", parse_memory)):
+                old = (current.get(section) or {}).get(resource)
+                if old is None:
+                    return True
+                old, new = parse(old), parse(recommended[section][resource])
+                if abs(new - old) > self.min_change * max(old, new):
+                    return True
+        return False
+
+    def apply_recommendation(self, bot_config) -> bool:
+        # Called on reconcile; returns True when bot_config.resources changed
+        if self.mode == "off":
+            return False
+        recommended = self.recommend(bot_config.bot_id, bot_config.broker)
+        if recommended is None or not self._differs(bot_config.resources or {}, recommended):
+            return False
+        if self.mode == "recommend":
+            logger.info(f"Recommended resources for bot '{bot_config.bot_id}': {recommended}.")
+            return False
+        logger.info(f"Resizing bot '{bot_config.bot_id}' from {bot_config.resources} to {recommended}.")
+        # Replaced rather than updated in place, other configs may hold the old dict
+        bot_config.resources = recommended
+        return True
+
+    def start(self, interval: float = 60.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+
+        def run():
+            while not self._stopped.wait(interval):
+                try:
+                    self.sample()
+                except Exception as exception:
+                    logger.warning(f"Resource usage sampling failed: {exception}")
+
+        self._thread = threading.Thread(target=run, name="right-sizer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
@@ -0,0 +1,206 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from kubernetes.client.exceptions import ApiException
+
+logger = logging.getLogger(__name__)
+
+class Waiter:
+    def __init__(self, condition: Callable, check: Optional[Callable] = None):
+        # condition(event type, object) -> bool is offered every watch event;
+        # check() -> result or None reads the current state directly
+        self.condition = condition
+        self.check = check
+        self.result = None
+        self.error: Optional[Exception] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _finish(self, result=None, error: Optional[Exception] = None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def offer(self, event_type: str, obj):
+        if self.done:
+            return
+        try:
+            if self.condition(event_type, obj):
+                self._finish(obj)
+        except Exception as exception:
+            self._finish(error=exception)
+
+    def recheck(self):
+        if self.done or self.check is None:
+            return
+        try:
+            result = self.check()
+            if result is not None:
+                self._finish(result)
+        except Exception as exception:
+            self._finish(error=exception)
+
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(max(0.0, timeout))
+
+class _WatchStream:
+    # One watch connection, fanned out to every waiter on the same
+    # (list function, namespace, label selector)
+    def __init__(self, multiplexer: "WatchMultiplexer", key: Tuple[str, Optional[str], Optional[str]]):
+        self.multiplexer = multiplexer
+        self.key = key
+        self.waiters: Set[Waiter] = set()
+        self.idle_since = time.monotonic()
+        self.resource_version: Optional[str] = None
+        self.synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch = None
+        self._thread = threading.Thread(target=self._run, name=f"watch-{key[0]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    def _call_arguments(self) -> Tuple[Callable, tuple, Dict]:
+        function_name, namespace, label_selector = self.key
+        function = getattr(self.multiplexer.backend.core_api, function_name)
+        arguments = (namespace,) if namespace else ()
+        keyword_arguments = {'label_selector': label_selector} if label_selector else {}
+        return function, arguments, keyword_arguments
+
+    def _relist(self):
+        function, arguments, keyword_arguments = self._call_arguments()
+        self.resource_version = function(*arguments, **keyword_arguments).metadata.resource_version
+        self.synced.set()
+        # Changes between the old and new resource version were never seen
+        for waiter in self.multiplexer._waiters(self):
+            waiter.recheck()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                function, arguments, keyword_arguments = self._call_arguments()
+                self._watch = self.multiplexer.backend.watch()
+                for event in self._watch.stream(
+                    function,
+                    *arguments,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.multiplexer.watch_timeout,
+                    allow_watch_bookmarks=True,
+                    **keyword_arguments
+                ):
+                    if event['type'] == 'ERROR':
+                        if event['raw_object'].get('code') == 410:
+                            self.resource_version = None
+                        break
+                    if event['type'] == 'BOOKMARK':
+                        # Bookmarks arrive as raw dicts, not deserialized models
+                        self.resource_version = event['raw_object']['metadata']['resourceVersion']
+                    else:
+                        obj = event['object']
+                        self.resource_version = obj.metadata.resource_version
+                        for waiter in self.multiplexer._waiters(self):
+                            waiter.offer(event['type'], obj)
+                    if self.multiplexer._expire(self):
+                        return
+                backoff = 1
+                if self.multiplexer._expire(self):
+                    return
+            except ApiException as api_exception:
+                if api_exception.status == 410:
+                    self.resource_version = None
+                    continue
+                logger.warning(f"Watch on '{self.key[0]}' failed: {api_exception}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            except Exception as exception:
+                if self._stopped.is_set():
+                    break
+                logger.warning(f"Watch on '{self.key[0]}' interrupted: {exception}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+class WatchMultiplexer:
+    def __init__(self, backend, watch_timeout: int = 60, linger: float = 30.0):
+        self.backend = backend
+        self.watch_timeout = watch_timeout
+        # Idle streams stay open at least this long so bursts of waits reuse
+        # them, and close on the next event or watch timeout after that
+        self.linger = linger
+        self._streams: Dict[Tuple[str, Optional[str], Optional[str]], _WatchStream] = {}
+        self._lock = threading.Lock()
+
+    def _waiters(self, stream: _WatchStream) -> Set[Waiter]:
+        with self._lock:
+            return set(stream.waiters)
+
+    def _expire(self, stream: _WatchStream) -> bool:
+        with self._lock:
+            if stream.waiters or time.monotonic() - stream.idle_since < self.linger:
+                return False
+            if self._streams.get(stream.key) is stream:
+                del self._streams[stream.key]
+        stream.stop()
+        return True
+
+    def wait(
+        self,
+        function_name: str,
+        condition: Callable,
+        check: Optional[Callable] = None,
+        timeout: float = 120.0,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None
+    ):
+        # Blocks until condition accepts an event or check() returns a result,
+        # which is returned; raises TimeoutError otherwise. check() runs once
+        # the watch is established, so no change can fall between the two.
+        key = (function_name, namespace, label_selector)
+        waiter = Waiter(condition, check)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = _WatchStream(self, key)
+                stream.start()
+            stream.waiters.add(waiter)
+        try:
+            if stream.synced.wait(timeout):
+                waiter.recheck()
+                waiter.wait(deadline - time.monotonic())
+        finally:
+            with self._lock:
+                stream.waiters.discard(waiter)
+                if not stream.waiters:
+                    stream.idle_since = time.monotonic()
+        if not waiter.done:
+            raise TimeoutError(f"Condition on '{function_name}' not met within {timeout}s.")
+        if waiter.error is not None:
+            raise waiter.error
+        return waiter.result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'streams': len(self._streams),
+                'waiters': sum(len(stream.waiters) for stream in self._streams.values()),
+            }
+
+    def stop(self):
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for stream in streams:
+            stream.stop()
@@ -0,0 +1,162 @@
+"""Benchmark the bot lifecycle against in-process stand-ins.
+
+Runs add_bot, get_bot_logs, list_bots, update_bot_config and remove_bot at
+each fleet size against FakeKubernetesBackend, a fake Docker client and
+local file:// git repositories, then reports throughput, p50/p99 latency per
+operation and peak traced memory. Results are written as JSON so runs can be
+compared:
+
+    python benchmarks/bench_lifecycle.py --sizes 10 100 --output before.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeDockerClient, make_local_repositories
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples: List[float], wall_time: float) -> Dict:
+    return {
+        'count': len(samples),
+        'throughput_per_second': round(len(samples) / wall_time, 3) if wall_time else None,
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+def timed(operation: Callable, items: List) -> Dict:
+    samples = []
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        operation(item)
+        samples.append(time.perf_counter() - call_started)
+    return summarize(samples, time.perf_counter() - started)
+
+def run_fleet(size: int, arguments, repository_urls: List[str], work_directory: str) -> Dict:
+    from BotConfig import BotConfig
+    from BotManager import BotManager
+    from GitConfig import GitConfig
+    from benchmarks.fake_kubernetes import FakeKubernetesBackend
+
+    os.environ["IMAGE_CACHE_INDEX"] = os.path.join(work_directory, f"image-cache-{size}.json")
+    backend = FakeKubernetesBackend(
+        latency=arguments.api_latency,
+        pod_startup_delay=arguments.pod_startup_delay
+    )
+    docker_client = FakeDockerClient(build_latency=arguments.build_latency)
+    manager = BotManager(
+        backend=backend,
+        docker_client=docker_client,
+        packing_users=["*"] if arguments.packing else None
+    )
+    git_config = GitConfig("", repo_path=os.path.join(work_directory, f"repos-{size}"))
+
+    bot_ids = [f"bot{index:05d}" for index in range(size)]
+    configs = {
+        bot_id: BotConfig(
+            user_id=f"user{index % max(1, size // 10)}",
+            bot_id=bot_id,
+            repository_url=repository_urls[index % len(repository_urls)],
+            broker="alpaca"
+        )
+        for index, bot_id in enumerate(bot_ids)
+    }
+
+    def add(bot_id: str):
+        manager.add_bot(configs[bot_id], git_config)
+        namespace = manager.bots[bot_id]['namespace']
+        pod_name, container_name = manager.bot_placement(bot_id)
+        for line in range(arguments.log_lines):
+            backend.cluster.append_pod_log(namespace, pod_name, f"tick {line} for {bot_id}", container_name)
+
+    def update(bot_id: str):
+        new_config = BotConfig(
+            user_id=configs[bot_id].user_id,
+            bot_id=bot_id,
+            repository_url=configs[bot_id].repository_url,
+            broker="alpaca"
+        )
+        new_config.resources = {"limits": {"cpu": "0.25", "memory": "256Mi"}}
+        manager.update_bot_config(bot_id, new_config, git_config)
+
+    tracemalloc.start()
+    results = {'add_bot': timed(add, bot_ids)}
+    pods = len(backend.cluster.objects.get("Pod", {}))
+    results.update({
+        'get_bot_logs': timed(manager.get_bot_logs, bot_ids),
+        'list_bots': timed(lambda _: manager.list_bots(), range(arguments.list_calls)),
+        'update_bot_config': timed(update, bot_ids),
+        'remove_bot': timed(manager.remove_bot, bot_ids),
+    })
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'fleet_size': size,
+        'operations': results,
+        'peak_memory_mb': round(peak / (1024 * 1024), 3),
+        'pods': pods,
+        'docker_builds': docker_client.images.builds,
+        'build_context_bytes': docker_client.api.context_bytes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--api-latency", type=float, default=0.002, help="seconds added to every Kubernetes call")
+    parser.add_argument("--build-latency", type=float, default=0.05, help="seconds per fake Docker build")
+    parser.add_argument("--pod-startup-delay", type=float, default=0.0)
+    parser.add_argument("--repositories", type=int, default=5, help="number of local strategy repositories")
+    parser.add_argument("--log-lines", type=int, default=20, help="log lines written per bot")
+    parser.add_argument("--list-calls", type=int, default=1000)
+    parser.add_argument("--packing", action="store_true", help="pack every user's small bots into shared pods")
+    parser.add_argument("--output", default="bench_lifecycle.json")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bot-bench-") as work_directory:
+        repository_urls = make_local_repositories(os.path.join(work_directory, "origin"), arguments.repositories)
+        for size in arguments.sizes:
+            run = run_fleet(size, arguments, repository_urls, work_directory)
+            runs.append(run)
+            print(
+                f"fleet={size} pods={run['pods']} peak_memory={run['peak_memory_mb']}MB "
+                f"builds={run['docker_builds']}"
+            )
+            for operation, stats in run['operations'].items():
+                print(
+                    f"  {operation:<18} {stats['throughput_per_second']:>10} ops/s"
+                    f"  p50 {stats['p50_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms"
+                )
+
+    report = {
+        'benchmark': 'lifecycle',
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'python': platform.python_version(),
+        'parameters': {key: value for key, value in vars(arguments).items() if key != 'output'},
+        'runs': runs,
+    }
+    with open(arguments.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {arguments.output}")
+
+if __name__ == "__main__":
+    main()
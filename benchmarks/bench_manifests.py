@@ -0,0 +1,215 @@
+"""Benchmark building and serializing bot manifests.
+
+Compares the generated-model path deploys used before manifest templates
+(nested V1Pod/V1Role/... objects, sanitized by the client on every call)
+against the dict templates BotManager builds now, for pods, RBAC objects and
+secrets, and times exporting the whole fleet as YAML. Both paths must yield
+the same spec hash for every bot. Results are written as JSON:
+
+    python benchmarks/bench_manifests.py --bots 1000 --output manifests.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kubernetes import client
+
+from benchmarks.bench_lifecycle import summarize
+
+BROKERS = ["alpaca", "tradier", "kraken", "coinbase", "interactive_brokers"]
+
+def model_pod_manifest(bot_config, namespace_name: str, secret_name: str) -> client.V1Pod:
+    # The pod as deploys built it from generated models
+    from BotReconciler import (
+        BUILD_HASH_ANNOTATION, REPOSITORY_ANNOTATION, SOURCE_COMMIT_ANNOTATION, SPEC_HASH_ANNOTATION,
+        build_hash, manifest_hash,
+    )
+    container = client.V1Container(
+        name="bot",
+        image=bot_config.image,
+        image_pull_policy="Always",
+        resources=client.V1ResourceRequirements(**bot_config.resources),
+        env=[
+            client.V1EnvVar(
+                name=k,
+                value_from=client.V1EnvVarSource(
+                    secret_key_ref=client.V1SecretKeySelector(name=secret_name, key=k)
+                ),
+            )
+            for k in bot_config.broker_config.keys()
+        ],
+        security_context=client.V1SecurityContext(
+            run_as_non_root=True,
+            allow_privilege_escalation=False,
+            read_only_root_filesystem=True,
+            capabilities=client.V1Capabilities(drop=["ALL"])
+        ),
+    )
+    pod_manifest = client.V1Pod(
+        metadata=client.V1ObjectMeta(
+            name=f"bot-{bot_config.bot_id}",
+            namespace=namespace_name,
+            labels={
+                "app": "bot",
+                "bot_id": bot_config.bot_id,
+                "user_id": bot_config.user_id,
+                "broker": bot_config.broker
+            }
+        ),
+        spec=client.V1PodSpec(
+            service_account_name="bot-service-account",
+            automount_service_account_token=False,
+            security_context=client.V1PodSecurityContext(
+                run_as_non_root=True, run_as_user=1000, run_as_group=3000, fs_group=2000
+            ),
+            containers=[container],
+            restart_policy="Never",
+            image_pull_secrets=[client.V1LocalObjectReference(name="registry-credentials")]
+        ),
+    )
+    pod_manifest.metadata.annotations = {
+        SPEC_HASH_ANNOTATION: manifest_hash(pod_manifest.spec),
+        BUILD_HASH_ANNOTATION: build_hash(bot_config.build_parameters),
+        REPOSITORY_ANNOTATION: bot_config.repository_url,
+        SOURCE_COMMIT_ANNOTATION: bot_config.source_commit,
+    }
+    return pod_manifest
+
+def model_namespace_objects(namespace: str, broker_config: Dict) -> List:
+    return [
+        client.V1Namespace(metadata=client.V1ObjectMeta(name=namespace, labels={"name": namespace})),
+        client.V1ServiceAccount(metadata=client.V1ObjectMeta(name="bot-service-account")),
+        client.V1Role(
+            metadata=client.V1ObjectMeta(namespace=namespace, name="bot-role"),
+            rules=[client.V1PolicyRule(api_groups=[""], resources=[], verbs=[])]
+        ),
+        client.V1RoleBinding(
+            metadata=client.V1ObjectMeta(namespace=namespace, name="bot-rolebinding"),
+            subjects=[client.RbacV1Subject(kind="ServiceAccount", name="bot-service-account", namespace=namespace)],
+            role_ref=client.V1RoleRef(kind="Role", name="bot-role", api_group="rbac.authorization.k8s.io")
+        ),
+        client.V1Secret(
+            metadata=client.V1ObjectMeta(name="broker-secrets"),
+            string_data={k: str(v) for k, v in broker_config.items() if v is not None},
+            type="Opaque",
+        ),
+    ]
+
+def template_namespace_objects(namespace: str, broker_config: Dict) -> List[Dict]:
+    from ManifestTemplates import (
+        namespace_manifest, role_binding_manifest, role_manifest, secret_manifest, service_account_manifest,
+    )
+    return [
+        namespace_manifest(namespace),
+        service_account_manifest(),
+        role_manifest(namespace),
+        role_binding_manifest(namespace),
+        secret_manifest("broker-secrets", broker_config),
+    ]
+
+def timed_rounds(operation: Callable[[], None], rounds: int, count: int) -> Dict:
+    # Per-item latency is the round's time spread over its items
+    samples = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        round_started = time.perf_counter()
+        operation()
+        samples.extend([(time.perf_counter() - round_started) / count] * count)
+    return summarize(samples, time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", default="bench_manifests.json")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from BotConfig import BotConfig
+    from BotManager import BotManager
+    from BotReconciler import SPEC_HASH_ANNOTATION
+    from benchmarks.fake_kubernetes import FakeKubernetesBackend
+
+    manager = BotManager(backend=FakeKubernetesBackend())
+    serializer = client.ApiClient()
+    configs = []
+    for index in range(arguments.bots):
+        bot_config = BotConfig(
+            user_id=f"user{index % 100}",
+            bot_id=f"bot{index:05d}",
+            repository_url="https://github.com/example/strategy.git",
+            broker=BROKERS[index % len(BROKERS)]
+        )
+        bot_config.image = f"registry.example.com/bot:{index % 10}"
+        bot_config.source_commit = "0" * 40
+        configs.append(bot_config)
+    namespaces = [f"bot-{bot_config.user_id}-{bot_config.bot_id}" for bot_config in configs]
+
+    mismatches = sum(
+        1 for bot_config, namespace in zip(configs, namespaces)
+        if model_pod_manifest(bot_config, namespace, "broker-secrets").metadata.annotations[SPEC_HASH_ANNOTATION]
+        != manager.build_pod_manifest(bot_config, namespace)["metadata"]["annotations"][SPEC_HASH_ANNOTATION]
+    )
+
+    def send(body):
+        # What the client does with every request body
+        json.dumps(serializer.sanitize_for_serialization(body))
+
+    def model_pods():
+        for bot_config, namespace in zip(configs, namespaces):
+            send(model_pod_manifest(bot_config, namespace, "broker-secrets"))
+
+    def template_pods():
+        for bot_config, namespace in zip(configs, namespaces):
+            send(manager.build_pod_manifest(bot_config, namespace))
+
+    def model_namespaces():
+        for bot_config, namespace in zip(configs, namespaces):
+            for body in model_namespace_objects(namespace, bot_config.broker_config):
+                send(body)
+
+    def template_namespaces():
+        for bot_config, namespace in zip(configs, namespaces):
+            for body in template_namespace_objects(namespace, bot_config.broker_config):
+                send(body)
+
+    count = len(configs)
+    results = {
+        'pod_models': timed_rounds(model_pods, arguments.rounds, count),
+        'pod_templates': timed_rounds(template_pods, arguments.rounds, count),
+        'namespace_objects_models': timed_rounds(model_namespaces, arguments.rounds, count),
+        'namespace_objects_templates': timed_rounds(template_namespaces, arguments.rounds, count),
+        'export_yaml': timed_rounds(
+            lambda: manager.export_manifests(bot_configs=configs), arguments.rounds, count
+        ),
+    }
+    for operation, stats in results.items():
+        print(
+            f"  {operation:<28} {stats['throughput_per_second']:>10} bots/s"
+            f"  p50 {stats['p50_ms']:>9} ms"
+        )
+    print(f"spec hash mismatches: {mismatches}")
+
+    report = {
+        'benchmark': 'manifests',
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'python': platform.python_version(),
+        'parameters': {key: value for key, value in vars(arguments).items() if key != 'output'},
+        'spec_hash_mismatches': mismatches,
+        'operations': results,
+    }
+    with open(arguments.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {arguments.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark manager startup: import, construction and first calls.
+
+Every repeat runs in a fresh interpreter so nothing is already imported or
+configured. Each run times:
+
+- importing BotManager, and which heavy stacks that import pulls in
+- constructing BotManager with the default KubernetesBackend, which must not
+  touch the cluster configuration
+- the first Kubernetes API access: loading kubeconfig or in-cluster config
+  and creating the client (skipped when no configuration is available)
+- the first list_bots/get_bot_status calls against FakeKubernetesBackend
+- the first add_bot against FakeKubernetesBackend, a fake Docker client and
+  a local git repository, which is where the git and Docker stacks load
+
+Medians across repeats are written as JSON:
+
+    python benchmarks/bench_startup.py --repeats 5 --output startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ["kubernetes", "docker", "git", "requests", "prometheus_client", "yaml"]
+
+def loaded_heavy_modules() -> List[str]:
+    return [module for module in HEAVY_MODULES if module in sys.modules]
+
+def child(repository_url: str, work_directory: str) -> Dict:
+    import logging
+    timings: Dict = {}
+
+    started = time.perf_counter()
+    import BotManager
+    timings['import_seconds'] = time.perf_counter() - started
+    timings['modules_after_import'] = loaded_heavy_modules()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from KubernetesBackend import KubernetesBackend
+    from benchmarks.fake_kubernetes import FakeKubernetesBackend
+    started = time.perf_counter()
+    manager = BotManager.BotManager(backend=KubernetesBackend())
+    timings['construct_seconds'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        manager.kubernetes_core_api
+        timings['first_api_seconds'] = time.perf_counter() - started
+    except Exception as exception:
+        timings['first_api_seconds'] = None
+        timings['first_api_error'] = str(exception).splitlines()[0]
+
+    os.environ["IMAGE_CACHE_INDEX"] = os.path.join(work_directory, f"image-cache-{os.getpid()}.json")
+    fake_manager = BotManager.BotManager(backend=FakeKubernetesBackend())
+    started = time.perf_counter()
+    fake_manager.list_bots(user_id="user0")
+    fake_manager.get_bot_status("bot0")
+    timings['first_status_seconds'] = time.perf_counter() - started
+
+    from BotConfig import BotConfig
+    from GitConfig import GitConfig
+    from benchmarks.fakes import FakeDockerClient
+    fake_manager.docker_client = FakeDockerClient(build_latency=0.0)
+    git_config = GitConfig("", repo_path=os.path.join(work_directory, f"repos-{os.getpid()}"))
+    started = time.perf_counter()
+    fake_manager.add_bot(BotConfig("user0", "bot0", repository_url, "alpaca"), git_config)
+    timings['first_add_bot_seconds'] = time.perf_counter() - started
+    timings['modules_after_add_bot'] = loaded_heavy_modules()
+    return timings
+
+def median(runs: List[Dict], key: str):
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return round(statistics.median(values), 4) if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="bench_startup.json")
+    parser.add_argument("--child", nargs=2, metavar=("REPOSITORY_URL", "WORK_DIRECTORY"), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child:
+        print(json.dumps(child(*arguments.child)))
+        return
+
+    from benchmarks.fakes import make_local_repositories
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bot-bench-") as work_directory:
+        repository_url = make_local_repositories(os.path.join(work_directory, "origin"), 1)[0]
+        for _ in range(arguments.repeats):
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", repository_url, work_directory],
+                cwd=ROOT, capture_output=True, text=True, check=True
+            )
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    keys = ['import_seconds', 'construct_seconds', 'first_api_seconds', 'first_status_seconds', 'first_add_bot_seconds']
+    summary = {key: median(runs, key) for key in keys}
+    for key, value in summary.items():
+        print(f"  {key:<24} {'n/a' if value is None else f'{value * 1000:.1f} ms'}")
+    print(f"  loaded after import:     {', '.join(runs[0]['modules_after_import'])}")
+    print(f"  loaded after add_bot:    {', '.join(runs[0]['modules_after_add_bot'])}")
+    if runs[0].get('first_api_error'):
+        print(f"  first API access failed: {runs[0]['first_api_error']}")
+
+    report = {
+        'benchmark': 'startup',
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'python': platform.python_version(),
+        'parameters': {key: value for key, value in vars(arguments).items() if key not in ('output', 'child')},
+        'summary': summary,
+        'runs': runs,
+    }
+    with open(arguments.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {arguments.output}")
+
+if __name__ == "__main__":
+    main()
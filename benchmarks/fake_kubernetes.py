@@ -0,0 +1,495 @@
+import time
+import copy
+import uuid
+import base64
+import functools
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from kubernetes import client
+from kubernetes.client.exceptions import ApiException
+
+from KubernetesBackend import ThrottledApi, TokenBucket
+
+# In-memory stand-ins for the Kubernetes API, for benchmarks and local checks
+
+def _camel_case(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+class FakeObject(dict):
+    # Read-only attribute view over the JSON form of an object, so code
+    # written against the generated models (pod.metadata.labels, ...) works
+    # unchanged. Missing fields read as None, like unset model fields.
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = self.get(_camel_case(name), self.get(name))
+        if isinstance(value, dict) and not isinstance(value, FakeObject):
+            return FakeObject(value)
+        if isinstance(value, list):
+            return [FakeObject(item) if isinstance(item, dict) else item for item in value]
+        return value
+
+class FakeList:
+    def __init__(self, items: List[FakeObject], resource_version: str):
+        self.items = items
+        self.metadata = FakeObject({"resourceVersion": resource_version})
+
+class FakeLogResponse:
+    def __init__(self, lines: Iterator[str], closed: threading.Event, condition: threading.Condition):
+        self._lines = lines
+        self._closed = closed
+        self._condition = condition
+
+    def stream(self, chunk_size: int = 16 * 1024, decode_content: bool = True) -> Iterator[bytes]:
+        for line in self._lines:
+            yield f"{line}\n".encode()
+
+    def close(self):
+        # Wakes a follow blocked on a quiet pod, as closing the socket would
+        with self._condition:
+            self._closed.set()
+            self._condition.notify_all()
+
+    def release_conn(self):
+        pass
+
+def _matches_selector(labels: Dict[str, str], selector: Optional[str]) -> bool:
+    if not selector:
+        return True
+    for requirement in selector.split(","):
+        if "!=" in requirement:
+            key, value = requirement.split("!=", 1)
+            if labels.get(key) == value:
+                return False
+        elif "=" in requirement:
+            key, value = requirement.split("=", 1)
+            if labels.get(key) != value.lstrip("="):
+                return False
+        elif labels.get(requirement) is None:
+            return False
+    return True
+
+def _matches_fields(data: Dict, selector: Optional[str]) -> bool:
+    if not selector:
+        return True
+    for requirement in selector.split(","):
+        path, value = requirement.split("=", 1)
+        current = data
+        for key in path.split("."):
+            current = (current or {}).get(key)
+        if str(current) != value:
+            return False
+    return True
+
+def _merge(target: Dict, patch: Dict):
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        elif value is None:
+            target.pop(key, None)
+        else:
+            target[key] = copy.deepcopy(value)
+
+class FakeCluster:
+    def __init__(self, pod_startup_delay: float = 0.0):
+        self.pod_startup_delay = pod_startup_delay
+        self.objects: Dict[str, Dict] = {}
+        self.events: List[Dict] = []
+        # (namespace, pod, container) -> timestamped lines
+        self.pod_logs: Dict[tuple, List[str]] = {}
+        # (namespace, pod) -> {container: {"cpu": ..., "memory": ...}} as metrics-server reports it
+        self.pod_usage: Dict[tuple, Dict[str, Dict[str, str]]] = {}
+        self.resource_version = 0
+        self.condition = threading.Condition()
+        self._serializer = client.ApiClient()
+
+    def _not_found(self, kind: str, name: str):
+        return ApiException(status=404, reason=f"{kind} '{name}' not found")
+
+    def _record(self, event_type: str, kind: str, data: Dict):
+        # Caller holds the condition
+        self.resource_version += 1
+        data["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.events.append({"type": event_type, "kind": kind, "object": copy.deepcopy(data)})
+        self.condition.notify_all()
+
+    def _normalize(self, kind: str, namespace: Optional[str], body) -> Dict:
+        data = copy.deepcopy(self._serializer.sanitize_for_serialization(body))
+        data.setdefault("metadata", {})
+        if namespace:
+            data["metadata"]["namespace"] = namespace
+        if kind == "Secret" and "stringData" in data:
+            encoded = {k: base64.b64encode(str(v).encode()).decode() for k, v in data.pop("stringData").items()}
+            data.setdefault("data", {}).update(encoded)
+        return data
+
+    def create(self, kind: str, namespace: Optional[str], body) -> FakeObject:
+        data = self._normalize(kind, namespace, body)
+        name = data["metadata"]["name"]
+        with self.condition:
+            store = self.objects.setdefault(kind, {})
+            if (namespace, name) in store:
+                raise ApiException(status=409, reason=f"{kind} '{name}' already exists")
+            if namespace and (None, namespace) not in self.objects.get("Namespace", {}):
+                raise self._not_found("Namespace", namespace)
+            data["metadata"]["creationTimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            data["metadata"]["uid"] = str(uuid.uuid4())
+            if kind == "Pod":
+                data["status"] = {"phase": "Pending" if self.pod_startup_delay else "Running"}
+            if kind == "Namespace":
+                data["status"] = {"phase": "Active"}
+            store[(namespace, name)] = data
+            self._record("ADDED", kind, data)
+        if kind == "Pod" and self.pod_startup_delay:
+            threading.Timer(self.pod_startup_delay, self.set_pod_phase, (namespace, name, "Running")).start()
+        return FakeObject(copy.deepcopy(data))
+
+    def read(self, kind: str, namespace: Optional[str], name: str) -> FakeObject:
+        with self.condition:
+            data = self.objects.get(kind, {}).get((namespace, name))
+            if data is None:
+                raise self._not_found(kind, name)
+            return FakeObject(copy.deepcopy(data))
+
+    def patch(self, kind: str, namespace: Optional[str], name: str, body) -> FakeObject:
+        patch = self._normalize(kind, None, body)
+        with self.condition:
+            data = self.objects.get(kind, {}).get((namespace, name))
+            if data is None:
+                raise self._not_found(kind, name)
+            expected_version = patch["metadata"].pop("resourceVersion", None)
+            if expected_version and expected_version != data["metadata"]["resourceVersion"]:
+                raise ApiException(status=409, reason=f"{kind} '{name}' was modified")
+            patch["metadata"].pop("namespace", None)
+            _merge(data, patch)
+            self._record("MODIFIED", kind, data)
+            return FakeObject(copy.deepcopy(data))
+
+    def replace(self, kind: str, namespace: Optional[str], name: str, body) -> FakeObject:
+        replacement = self._normalize(kind, namespace, body)
+        with self.condition:
+            data = self.objects.get(kind, {}).get((namespace, name))
+            if data is None:
+                raise self._not_found(kind, name)
+            replacement["metadata"]["name"] = name
+            replacement["metadata"]["creationTimestamp"] = data["metadata"].get("creationTimestamp")
+            replacement.setdefault("status", data.get("status"))
+            self.objects[kind][(namespace, name)] = replacement
+            self._record("MODIFIED", kind, replacement)
+            return FakeObject(copy.deepcopy(replacement))
+
+    def delete(self, kind: str, namespace: Optional[str], name: str) -> FakeObject:
+        with self.condition:
+            data = self.objects.get(kind, {}).pop((namespace, name), None)
+            if data is None:
+                raise self._not_found(kind, name)
+            if kind == "Namespace":
+                # Namespace deletion cascades to everything inside it
+                for other_kind, store in self.objects.items():
+                    for key in [key for key in store if key[0] == name]:
+                        self._record("DELETED", other_kind, store.pop(key))
+            if kind == "Pod":
+                for key in [key for key in self.pod_logs if key[:2] == (namespace, name)]:
+                    del self.pod_logs[key]
+                self.pod_usage.pop((namespace, name), None)
+            self._record("DELETED", kind, data)
+            return FakeObject(copy.deepcopy(data))
+
+    def list(
+        self,
+        kind: str,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None
+    ) -> FakeList:
+        with self.condition:
+            items = [
+                FakeObject(copy.deepcopy(data))
+                for (object_namespace, _), data in self.objects.get(kind, {}).items()
+                if (namespace is None or object_namespace == namespace)
+                and _matches_selector(data["metadata"].get("labels") or {}, label_selector)
+                and _matches_fields(data, field_selector)
+            ]
+            return FakeList(items, str(self.resource_version))
+
+    def set_pod_phase(self, namespace: str, name: str, phase: str):
+        with self.condition:
+            data = self.objects.get("Pod", {}).get((namespace, name))
+            if data is None:
+                return
+            data.setdefault("status", {})["phase"] = phase
+            if phase == "Running":
+                data["status"]["startTime"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            self._record("MODIFIED", "Pod", data)
+
+    def set_pod_usage(self, namespace: str, name: str, cpu: str, memory: str, container: str = "bot"):
+        with self.condition:
+            self.pod_usage.setdefault((namespace, name), {})[container] = {"cpu": cpu, "memory": memory}
+
+    def pod_metrics(self, label_selector: Optional[str] = None) -> Dict:
+        with self.condition:
+            items = []
+            for (namespace, name), containers in self.pod_usage.items():
+                pod = self.objects.get("Pod", {}).get((namespace, name))
+                if pod is None or not _matches_selector(pod["metadata"].get("labels") or {}, label_selector):
+                    continue
+                items.append({
+                    "metadata": {"name": name, "namespace": namespace, "labels": pod["metadata"].get("labels") or {}},
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "window": "30s",
+                    "containers": [
+                        {"name": container, "usage": dict(usage)} for container, usage in containers.items()
+                    ],
+                })
+            return {"kind": "PodMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "items": items}
+
+    def append_pod_log(self, namespace: str, name: str, text: str, container: str = "bot"):
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + f".{time.time_ns() % 1_000_000_000:09d}Z"
+        with self.condition:
+            self.pod_logs.setdefault((namespace, name, container), []).append(f"{timestamp} {text}")
+            self.condition.notify_all()
+
+    def read_pod_log(
+        self,
+        name: str,
+        namespace: str,
+        follow: bool = False,
+        timestamps: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+        container: Optional[str] = None,
+        _preload_content: bool = True,
+        **kwargs
+    ):
+        self.read("Pod", namespace, name)
+        key = (namespace, name, container or "bot")
+
+        closed = threading.Event()
+
+        def lines() -> Iterator[str]:
+            with self.condition:
+                buffered = list(self.pod_logs.get(key, []))
+            if since_seconds is not None:
+                cutoff = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() - since_seconds))
+                buffered = [line for line in buffered if line[:19] >= cutoff]
+            if tail_lines is not None:
+                buffered = buffered[-tail_lines:] if tail_lines else []
+            position = len(self.pod_logs.get(key, []))
+            sent_bytes = 0
+            while True:
+                for line in buffered:
+                    output = line if timestamps else line.split(" ", 1)[1]
+                    sent_bytes += len(output) + 1
+                    yield output
+                    if limit_bytes is not None and sent_bytes >= limit_bytes:
+                        return
+                if not follow:
+                    return
+                with self.condition:
+                    while (
+                        (namespace, name) in self.objects.get("Pod", {})
+                        and len(self.pod_logs.get(key, [])) <= position
+                        and not closed.is_set()
+                    ):
+                        self.condition.wait(1.0)
+                    if (namespace, name) not in self.objects.get("Pod", {}) or closed.is_set():
+                        return
+                    buffered = self.pod_logs[key][position:]
+                    position += len(buffered)
+
+        if not _preload_content:
+            return FakeLogResponse(lines(), closed, self.condition)
+        return "".join(f"{line}\n" for line in lines())
+
+class FakeWatch:
+    def __init__(self, cluster: FakeCluster):
+        self.cluster = cluster
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def stream(self, func: Callable, *args, **kwargs) -> Iterator[Dict]:
+        kind = func.fake_kind
+        namespace = args[0] if args else kwargs.get("namespace")
+        label_selector = kwargs.get("label_selector")
+        field_selector = kwargs.get("field_selector")
+        resource_version = int(kwargs.get("resource_version") or self.cluster.resource_version)
+        timeout = kwargs.get("timeout_seconds")
+        deadline = time.monotonic() + timeout if timeout else None
+        bookmarks = kwargs.get("allow_watch_bookmarks")
+
+        # Event n in the log carries resourceVersion n + 1
+        position = resource_version
+        caught_up = False
+        while not self._stopped:
+            with self.cluster.condition:
+                pending = self.cluster.events[position:]
+                position = len(self.cluster.events)
+                if not pending and (caught_up or not bookmarks):
+                    remaining = deadline - time.monotonic() if deadline else 1.0
+                    if remaining <= 0:
+                        return
+                    self.cluster.condition.wait(min(remaining, 1.0))
+                    continue
+            if not pending:
+                # Like the API server, bookmark the current version once idle;
+                # the client yields bookmarks as raw dicts, not models
+                caught_up = True
+                bookmark = {"kind": kind, "apiVersion": "v1", "metadata": {"resourceVersion": str(position)}}
+                yield {"type": "BOOKMARK", "object": bookmark, "raw_object": bookmark}
+                continue
+            caught_up = False
+            for event in pending:
+                data = event["object"]
+                if event["kind"] != kind:
+                    continue
+                if namespace and data["metadata"].get("namespace") != namespace:
+                    continue
+                if not _matches_selector(data["metadata"].get("labels") or {}, label_selector):
+                    continue
+                if not _matches_fields(data, field_selector):
+                    continue
+                yield {"type": event["type"], "object": FakeObject(copy.deepcopy(data)), "raw_object": data}
+                if self._stopped:
+                    return
+
+class _FakeApi:
+    def __init__(self, cluster: FakeCluster):
+        self.cluster = cluster
+
+def _fake_list(kind: str, namespaced: bool):
+    def list_objects(self, *args, label_selector=None, field_selector=None, **kwargs):
+        namespace = args[0] if namespaced else None
+        return self.cluster.list(kind, namespace, label_selector, field_selector)
+    list_objects.fake_kind = kind
+    return list_objects
+
+class FakeCoreV1Api(_FakeApi):
+    def create_namespace(self, body, **kwargs):
+        return self.cluster.create("Namespace", None, body)
+
+    def read_namespace(self, name, **kwargs):
+        return self.cluster.read("Namespace", None, name)
+
+    def patch_namespace(self, name, body, **kwargs):
+        return self.cluster.patch("Namespace", None, name, body)
+
+    def delete_namespace(self, name, **kwargs):
+        return self.cluster.delete("Namespace", None, name)
+
+    list_namespace = _fake_list("Namespace", namespaced=False)
+
+    def create_namespaced_service_account(self, namespace, body, **kwargs):
+        return self.cluster.create("ServiceAccount", namespace, body)
+
+    def patch_namespaced_service_account(self, name, namespace, body, **kwargs):
+        return self.cluster.patch("ServiceAccount", namespace, name, body)
+
+    def create_namespaced_secret(self, namespace, body, **kwargs):
+        return self.cluster.create("Secret", namespace, body)
+
+    def read_namespaced_secret(self, name, namespace, **kwargs):
+        return self.cluster.read("Secret", namespace, name)
+
+    def patch_namespaced_secret(self, name, namespace, body, **kwargs):
+        return self.cluster.patch("Secret", namespace, name, body)
+
+    def replace_namespaced_secret(self, name, namespace, body, **kwargs):
+        return self.cluster.replace("Secret", namespace, name, body)
+
+    def delete_namespaced_secret(self, name, namespace, **kwargs):
+        return self.cluster.delete("Secret", namespace, name)
+
+    def create_namespaced_pod(self, namespace, body, **kwargs):
+        return self.cluster.create("Pod", namespace, body)
+
+    def read_namespaced_pod(self, name, namespace, **kwargs):
+        return self.cluster.read("Pod", namespace, name)
+
+    def delete_namespaced_pod(self, name, namespace, **kwargs):
+        return self.cluster.delete("Pod", namespace, name)
+
+    def read_namespaced_pod_log(self, name, namespace, **kwargs):
+        return self.cluster.read_pod_log(name, namespace, **kwargs)
+
+    list_namespaced_pod = _fake_list("Pod", namespaced=True)
+    list_pod_for_all_namespaces = _fake_list("Pod", namespaced=False)
+
+class FakeRbacAuthorizationV1Api(_FakeApi):
+    def create_namespaced_role(self, namespace, body, **kwargs):
+        return self.cluster.create("Role", namespace, body)
+
+    def patch_namespaced_role(self, name, namespace, body, **kwargs):
+        return self.cluster.patch("Role", namespace, name, body)
+
+    def create_namespaced_role_binding(self, namespace, body, **kwargs):
+        return self.cluster.create("RoleBinding", namespace, body)
+
+    def patch_namespaced_role_binding(self, name, namespace, body, **kwargs):
+        return self.cluster.patch("RoleBinding", namespace, name, body)
+
+class FakeCustomObjectsApi(_FakeApi):
+    def list_cluster_custom_object(self, group, version, plural, label_selector=None, **kwargs):
+        if (group, plural) != ("metrics.k8s.io", "pods"):
+            raise ApiException(status=404, reason=f"{plural}.{group} not found")
+        return self.cluster.pod_metrics(label_selector)
+
+class SlowApi:
+    # Sleeps before every call to simulate a slow API server; latency is
+    # seconds per call, or per verb/method name
+    def __init__(self, api, latency: Union[float, Dict[str, float]]):
+        self._api = api
+        self._latency = latency
+
+    def _seconds(self, name: str) -> float:
+        if isinstance(self._latency, dict):
+            verb = name.split("_", 1)[0]
+            return self._latency.get(name, self._latency.get(verb, 0.0))
+        return self._latency
+
+    def __getattr__(self, name: str):
+        method = getattr(self._api, name)
+        seconds = self._seconds(name)
+        if not callable(method) or name.startswith("_") or not seconds:
+            return method
+
+        # Keeps the docstring kubernetes.watch reads the return type from
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            time.sleep(seconds)
+            return method(*args, **kwargs)
+
+        return call
+
+class FakeKubernetesBackend:
+    def __init__(
+        self,
+        latency: Union[float, Dict[str, float], None] = None,
+        pod_startup_delay: float = 0.0,
+        qps: Optional[float] = None,
+        burst: Optional[int] = None
+    ):
+        # In-memory stand-in for an API server, for tests and benchmarks.
+        # latency is seconds per call, or per verb/method name.
+        self.cluster = FakeCluster(pod_startup_delay)
+        self.token_bucket = TokenBucket(qps, burst or int(qps)) if qps else None
+
+        def throttled(api):
+            return ThrottledApi(SlowApi(api, latency) if latency else api, self.token_bucket)
+
+        self.core_api = throttled(FakeCoreV1Api(self.cluster))
+        self.rbac_api = throttled(FakeRbacAuthorizationV1Api(self.cluster))
+        self.apps_api = None
+        self.auth_api = None
+        self.custom_objects_api = throttled(FakeCustomObjectsApi(self.cluster))
+
+    def watch(self):
+        return FakeWatch(self.cluster)
+
+    def set_call_observer(self, observer: Callable[[str, float, bool], None]):
+        for api in (self.core_api, self.rbac_api, self.custom_objects_api):
+            api.observer = observer
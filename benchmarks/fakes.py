@@ -0,0 +1,91 @@
+import os
+import time
+import hashlib
+import subprocess
+import threading
+from typing import Dict, List
+
+from docker.errors import ImageNotFound
+
+class FakeImage:
+    def __init__(self, tag: str, size: int):
+        self.id = "sha256:" + hashlib.sha256(tag.encode()).hexdigest()
+        self.tags = [tag]
+        self.attrs = {"Size": size}
+
+    def tag(self, reference: str):
+        self.tags.append(reference)
+
+class FakeImages:
+    def __init__(self, build_latency: float, image_size: int):
+        self.build_latency = build_latency
+        self.image_size = image_size
+        self.images: Dict[str, FakeImage] = {}
+        self.builds = 0
+        self._lock = threading.Lock()
+
+    def build(self, path: str, tag: str, buildargs: Dict = None, rm: bool = True, **kwargs):
+        time.sleep(self.build_latency)
+        image = FakeImage(tag, self.image_size)
+        with self._lock:
+            self.images[tag] = image
+            self.builds += 1
+        return image, iter([{"stream": f"Successfully tagged {tag}\n"}])
+
+    def get(self, reference: str) -> FakeImage:
+        with self._lock:
+            if reference not in self.images:
+                raise ImageNotFound(reference)
+            return self.images[reference]
+
+    def pull(self, reference: str) -> FakeImage:
+        return self.get(reference)
+
+    def push(self, reference: str, stream: bool = False, decode: bool = False):
+        return iter([])
+
+    def remove(self, reference: str, **kwargs):
+        with self._lock:
+            if self.images.pop(reference, None) is None:
+                raise ImageNotFound(reference)
+
+class FakeAPIClient:
+    def __init__(self, images: FakeImages):
+        self.images = images
+        self.context_bytes = 0
+
+    def build(self, fileobj=None, tag: str = None, buildargs: Dict = None, decode: bool = False, **kwargs):
+        # Reads the whole context like the daemon would, then streams progress
+        uploaded = len(fileobj.read())
+        with self.images._lock:
+            self.context_bytes += uploaded
+        self.images.build(path=None, tag=tag, buildargs=buildargs)
+        yield {"stream": f"Sending build context to Docker daemon  {uploaded}B\n"}
+        yield {"stream": "Step 1/3 : FROM python:3.11-slim\n"}
+        yield {"stream": f"Successfully tagged {tag}\n"}
+
+class FakeDockerClient:
+    # Stands in for docker.from_env(): builds only sleep and record the tag
+    def __init__(self, build_latency: float = 0.0, image_size: int = 200 * 1024 * 1024):
+        self.images = FakeImages(build_latency, image_size)
+        self.api = FakeAPIClient(self.images)
+
+def make_local_repositories(directory: str, count: int) -> List[str]:
+    # Small strategy repositories served over file:// for the git mirror cache
+    urls = []
+    environment = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+        GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com",
+    )
+    for index in range(count):
+        path = os.path.join(directory, f"strategy-{index}")
+        os.makedirs(path)
+        with open(os.path.join(path, "Dockerfile"), "w") as dockerfile:
+            dockerfile.write("FROM python:3.11-slim\nCOPY . /app\nCMD [\"python\", \"/app/main.py\"]\n")
+        with open(os.path.join(path, "main.py"), "w") as main:
+            main.write(f"print('strategy {index}')\n")
+        for command in (["git", "init", "-q", "-b", "main"], ["git", "add", "."], ["git", "commit", "-qm", "initial"]):
+            subprocess.run(command, cwd=path, env=environment, check=True)
+        urls.append(f"file://{path}")
+    return urls
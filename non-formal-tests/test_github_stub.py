@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GitHubClient import GitHubClient
+
+# Checks GitHubClient.get_repos against a local stand-in for the GitHub API:
+#
+#     python non-formal-tests/test_github_stub.py
+#     python -m pytest non-formal-tests/test_github_stub.py
+
+class StubGitHub:
+    def __init__(self, repo_count):
+        self.repos = [f'repo{index:04d}' for index in range(repo_count)]
+        # GitHub may leave the Link header off a 304
+        self.link_on_not_modified = True
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add_repos(self, count):
+        self.repos.extend(f'repo{index:04d}' for index in range(len(self.repos), len(self.repos) + count))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def statuses(self):
+        return [status for _, status in self.requests]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                page = int(query.get('page', ['1'])[0])
+                per_page = int(query.get('per_page', ['30'])[0])
+                repos = stub.repos[(page - 1) * per_page:page * per_page]
+                body = json.dumps([
+                    {'clone_url': f'https://github.com/example/{name}.git'} for name in repos
+                ]).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                last_page = max(1, -(-len(stub.repos) // per_page))
+                link = ', '.join(
+                    f'<{stub.url}{parsed.path}?per_page={per_page}&page={number}>; rel="{rel}"'
+                    for rel, number in (('next', page + 1), ('last', last_page)) if number <= last_page
+                )
+
+                not_modified = self.headers.get('If-None-Match') == etag
+                stub.requests.append((page, 304 if not_modified else 200))
+                self.send_response(304 if not_modified else 200)
+                self.send_header('ETag', etag)
+                self.send_header('X-RateLimit-Remaining', '4999')
+                if link and (stub.link_on_not_modified or not not_modified):
+                    self.send_header('Link', link)
+                if not_modified:
+                    self.end_headers()
+                    return
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+def run_against_stub(repo_count, check):
+    stub = StubGitHub(repo_count)
+    try:
+        with tempfile.TemporaryDirectory() as cache_directory:
+            github = GitHubClient('token', 'example', 'team', api_url=stub.url, cache_directory=cache_directory)
+            check(stub, github)
+    finally:
+        stub.close()
+
+def expected_urls(stub):
+    return [f'https://github.com/example/{name}.git' for name in stub.repos]
+
+def test_single_page():
+    def check(stub, github):
+        assert github.get_repos() == expected_urls(stub)
+        assert stub.statuses() == [200]
+    run_against_stub(42, check)
+
+def test_multiple_pages():
+    def check(stub, github):
+        assert github.get_repos() == expected_urls(stub)
+        assert sorted(stub.requests) == [(1, 200), (2, 200), (3, 200), (4, 200)]
+    run_against_stub(350, check)
+
+def test_unchanged_pages_are_not_modified():
+    def check(stub, github):
+        github.get_repos()
+        stub.requests.clear()
+        assert github.get_repos() == expected_urls(stub)
+        assert sorted(stub.requests) == [(1, 304), (2, 304), (3, 304), (4, 304)]
+    run_against_stub(350, check)
+
+def test_repos_added_after_first_page():
+    # Page 1 answers 304 while new pages appear after it
+    def check(stub, github):
+        github.get_repos()
+        stub.add_repos(200)
+        assert github.get_repos() == expected_urls(stub)
+        assert len(github.repo_urls) == 550
+    run_against_stub(350, check)
+
+def test_repos_added_without_link_on_not_modified():
+    # Only the stale cached Link header is known; the full last page gives it away
+    def check(stub, github):
+        stub.link_on_not_modified = False
+        github.get_repos()
+        stub.add_repos(150)
+        assert github.get_repos() == expected_urls(stub)
+        assert len(github.repo_urls) == 450
+    run_against_stub(300, check)
+
+def test_full_last_page_reads_one_more():
+    def check(stub, github):
+        assert github.get_repos() == expected_urls(stub)
+        assert stub.requests == [(1, 200), (2, 200)]
+    run_against_stub(100, check)
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f'{name}: ok')